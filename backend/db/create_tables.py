@@ -39,13 +39,80 @@ def create_tables():
         )
         """,
         """
+        CREATE TABLE IF NOT EXISTS job_embeddings (
+            job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+            model VARCHAR NOT NULL,
+            content_hash VARCHAR(64) NOT NULL,
+            embedding REAL[] NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (job_id, model)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS salary_range (
+            id SERIAL PRIMARY KEY,
+            job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+            min_salary FLOAT,
+            max_salary FLOAT,
+            frequency VARCHAR(30),
+            annual_min FLOAT,
+            annual_max FLOAT
+        )
+        """,
+        # Databases where the feature extraction step created salary_range, possibly with repeated jobs
+        """
+        ALTER TABLE salary_range ADD COLUMN IF NOT EXISTS annual_min FLOAT
+        """,
+        """
+        ALTER TABLE salary_range ADD COLUMN IF NOT EXISTS annual_max FLOAT
+        """,
+        """
+        DELETE FROM salary_range a USING salary_range b WHERE a.job_id = b.job_id AND a.id < b.id
+        """,
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS salary_range_job_id ON salary_range (job_id)
+        """,
+        # Salary filters and sorts compare the yearly figures
+        """
+        CREATE INDEX IF NOT EXISTS salary_range_annual_min ON salary_range (annual_min)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS salary_range_annual_max ON salary_range (annual_max)
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS job_digests (
+            job_id INTEGER PRIMARY KEY REFERENCES jobs(id) ON DELETE CASCADE,
+            requirements TEXT[],
+            skills TEXT[],
+            seniority VARCHAR(30),
+            years_experience INTEGER,
+            summary TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
         CREATE TABLE IF NOT EXISTS resumes (
             id SERIAL PRIMARY KEY,
             filename VARCHAR,
             raw_text VARCHAR,
-            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            file_hash VARCHAR(64),
+            text_hash VARCHAR(64)
         )
         """,
+        # Databases created before resumes were deduplicated
+        """
+        ALTER TABLE resumes ADD COLUMN IF NOT EXISTS file_hash VARCHAR(64)
+        """,
+        """
+        ALTER TABLE resumes ADD COLUMN IF NOT EXISTS text_hash VARCHAR(64)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS resumes_file_hash ON resumes USING HASH (file_hash)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS resumes_text_hash ON resumes USING HASH (text_hash)
+        """,
         """
         CREATE TABLE IF NOT EXISTS resume_data (
             resume_id INTEGER NOT NULL REFERENCES resumes(id) ON DELETE CASCADE,
@@ -59,6 +126,54 @@ def create_tables():
             certifications JSONB,
             projects JSONB
         )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS resume_tasks (
+            id SERIAL PRIMARY KEY,
+            filename VARCHAR,
+            file_path VARCHAR NOT NULL,
+            status VARCHAR(10) NOT NULL DEFAULT 'queued',
+            force BOOLEAN NOT NULL DEFAULT FALSE,
+            result JSONB,
+            error TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS resume_tasks_status ON resume_tasks (status, id)
+        """,
+        """
+        ALTER TABLE resume_tasks ADD COLUMN IF NOT EXISTS force BOOLEAN NOT NULL DEFAULT FALSE
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS resume_embeddings (
+            resume_id INTEGER NOT NULL REFERENCES resumes(id) ON DELETE CASCADE,
+            model VARCHAR NOT NULL,
+            content_hash VARCHAR(64) NOT NULL,
+            embedding REAL[] NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (resume_id, model)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS alert_subscriptions (
+            resume_id INTEGER PRIMARY KEY REFERENCES resumes(id) ON DELETE CASCADE,
+            threshold REAL NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS job_alerts (
+            id SERIAL PRIMARY KEY,
+            resume_id INTEGER NOT NULL REFERENCES resumes(id) ON DELETE CASCADE,
+            job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+            score REAL NOT NULL,
+            seen BOOLEAN DEFAULT FALSE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (resume_id, job_id)
+        )
         """
     )
     try:
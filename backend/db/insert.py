@@ -1,12 +1,15 @@
 import json
 import psycopg2
+from psycopg2.extras import execute_values
 from backend.db.config import load_config
 
 # ------ INSERT DATA TO POSTGRESQL DATABASE ------
 
 def insert_jobs(job_data):
-    """Insert original  job data directly into PostgreSQL database from Apify"""
+    """Insert original  job data directly into PostgreSQL database from Apify
+    Returns the newly inserted jobs (id, job_id, title, description, salary) so they can be embedded once"""
     config = load_config()
+    new_jobs = []
     try:
         with psycopg2.connect(**config) as conn:
             with conn.cursor() as cur:
@@ -17,7 +20,8 @@ def insert_jobs(job_data):
                         INSERT INTO jobs (job_id, title, company, location, salary, rating, reviews_count, 
                         url, apply_link, description, date_posted, scraped_at, is_expired, raw_data)
                         VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                        ON CONFLICT (job_id) DO NOTHING;
+                        ON CONFLICT (job_id) DO NOTHING
+                        RETURNING id, job_id, title, description, salary;
                         """, (
                             job.get("id"),
                             job.get("positionName", "N/A"),
@@ -36,6 +40,11 @@ def insert_jobs(job_data):
                         )
                     )
 
+                    # Only new rows come back, existing jobs already have their embeddings
+                    inserted = cur.fetchone()
+                    if inserted:
+                        new_jobs.append(dict(zip(["id", "job_id", "title", "description", "salary"], inserted)))
+
                     # Insert job types into 'job_types' and link to job
                     for job_type in job.get("jobType", []):
                         #  Normalize job type (capitalize and strip whitespace)
@@ -63,10 +72,12 @@ def insert_jobs(job_data):
                         )
             # commit the changes to the database
             conn.commit()
-            print(f"Successfully inserted {len(job_data)} job records.")
+            print(f"Successfully inserted {len(new_jobs)} new job records out of {len(job_data)}.")
+            return new_jobs
 
     except (Exception, psycopg2.DatabaseError) as error:
         print(error)
+        return []
 
 def insert_resumes(resumes):
     config = load_config()
@@ -75,12 +86,14 @@ def insert_resumes(resumes):
             with conn.cursor() as cur:
                 cur.execute(
                     """
-                    INSERT INTO resumes (filename, raw_text)
-                    VALUES (%s, %s)
+                    INSERT INTO resumes (filename, raw_text, file_hash, text_hash)
+                    VALUES (%s, %s, %s, %s)
                     RETURNING id;
                     """, (
                         resumes.get("filename"),
-                        resumes.get("raw_text")
+                        resumes.get("raw_text"),
+                        resumes.get("file_hash"),
+                        resumes.get("text_hash")
                     )
                 )
 
@@ -96,11 +109,14 @@ def insert_resumes(resumes):
         print(f"Error inserting resume to resumes table: {error}")
 
 
-def insert_resume_data(resume_id, resume_data):
+def insert_resume_data(resume_id, resume_data, replace=False):
+    """replace drops the resume's existing parsed data first (a forced re-parse)"""
     config = load_config()
     try:
         with psycopg2.connect(**config) as conn:
             with conn.cursor() as cur:
+                if replace:
+                    cur.execute("DELETE FROM resume_data WHERE resume_id = %s;", (resume_id,))
                 cur.execute(
                     """
                     INSERT INTO resume_data (resume_id, name, email, phone, location, education, experience, skills, certifications, projects)
@@ -122,10 +138,227 @@ def insert_resume_data(resume_id, resume_data):
 
             conn.commit()
             print("Successfully inserted resume data to database")
+            return True
+
+
+    except (Exception, psycopg2.DatabaseError) as e:
+        print(f"Failure inserting resume data: {e}")
+        return False
+
+def insert_job_embeddings(job_embeddings):
+    """Insert or refresh job embeddings, one row per job and embedding model"""
+    config = load_config()
+    try:
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                for job in job_embeddings:
+                    cur.execute(
+                        """
+                        INSERT INTO job_embeddings (job_id, model, content_hash, embedding)
+                        VALUES (%s, %s, %s, %s)
+                        ON CONFLICT (job_id, model) DO UPDATE
+                        SET content_hash = EXCLUDED.content_hash,
+                            embedding = EXCLUDED.embedding,
+                            created_at = CURRENT_TIMESTAMP;
+                        """, (
+                            job.get("id"),
+                            job.get("model"),
+                            job.get("content_hash"),
+                            list(job.get("embedding"))
+                        )
+                    )
+
+            conn.commit()
+            print(f"Successfully inserted {len(job_embeddings)} job embeddings.")
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error inserting job embeddings: {error}")
+
+def insert_resumes_batch(resumes):
+    """Insert many resumes (filename, raw_text) in one statement, returns their ids in the same order"""
+    config = load_config()
+    try:
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                rows = execute_values(
+                    cur,
+                    """
+                    INSERT INTO resumes (filename, raw_text, file_hash, text_hash)
+                    VALUES %s
+                    RETURNING id;
+                    """, [(resume.get("filename"), resume.get("raw_text"), resume.get("file_hash"),
+                           resume.get("text_hash")) for resume in resumes],
+                    fetch=True, page_size=len(resumes) or 1
+                )
+
+            conn.commit()
+            print(f"Successfully inserted {len(rows)} resumes to database.")
+            return [row[0] for row in rows]
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error inserting resumes to resumes table: {error}")
+        return []
 
 
+def insert_resume_data_batch(resume_data_list):
+    """Insert parsed data of many resumes, given as (resume_id, resume_data) pairs, in one statement"""
+    config = load_config()
+    try:
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO resume_data (resume_id, name, email, phone, location, education, experience, skills, certifications, projects)
+                    VALUES %s;
+                    """, [(
+                        resume_id,
+                        resume_data.get("name"),
+                        resume_data.get("email"),
+                        resume_data.get("phone"),
+                        resume_data.get("location"),
+                        json.dumps(resume_data.get("education")),
+                        json.dumps(resume_data.get("experience")),
+                        resume_data.get("skills"),
+                        json.dumps(resume_data.get("certifications")),
+                        json.dumps(resume_data.get("projects"))
+                    ) for resume_id, resume_data in resume_data_list]
+                )
+
+            conn.commit()
+            print(f"Successfully inserted {len(resume_data_list)} resume data rows to database")
+            return True
+
     except (Exception, psycopg2.DatabaseError) as e:
         print(f"Failure inserting resume data: {e}")
+        return False
+
+
+def insert_job_digests(job_digests):
+    """Insert or refresh the compact description digest of each job"""
+    config = load_config()
+    try:
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                cur.executemany(
+                    """
+                    INSERT INTO job_digests (job_id, requirements, skills, seniority, years_experience, summary)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    ON CONFLICT (job_id) DO UPDATE
+                    SET requirements = EXCLUDED.requirements,
+                        skills = EXCLUDED.skills,
+                        seniority = EXCLUDED.seniority,
+                        years_experience = EXCLUDED.years_experience,
+                        summary = EXCLUDED.summary,
+                        created_at = CURRENT_TIMESTAMP;
+                    """, [(digest["id"], digest["requirements"], digest["skills"], digest["seniority"],
+                           digest["years_experience"], digest["summary"]) for digest in job_digests]
+                )
+
+            conn.commit()
+            print(f"Successfully inserted {len(job_digests)} job digests.")
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error inserting job digests: {error}")
+
+def insert_salary_ranges(salary_ranges):
+    """Insert or refresh the parsed salary of each job (dicts with id, min_salary, max_salary, frequency,
+    annual_min, annual_max)"""
+    config = load_config()
+    try:
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                execute_values(
+                    cur,
+                    """
+                    INSERT INTO salary_range (job_id, min_salary, max_salary, frequency, annual_min, annual_max)
+                    VALUES %s
+                    ON CONFLICT (job_id) DO UPDATE
+                    SET min_salary = EXCLUDED.min_salary,
+                        max_salary = EXCLUDED.max_salary,
+                        frequency = EXCLUDED.frequency,
+                        annual_min = EXCLUDED.annual_min,
+                        annual_max = EXCLUDED.annual_max;
+                    """, [(salary["id"], salary["min_salary"], salary["max_salary"], salary["frequency"],
+                           salary["annual_min"], salary["annual_max"]) for salary in salary_ranges]
+                )
+
+            conn.commit()
+            print(f"Successfully inserted {len(salary_ranges)} salary ranges.")
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error inserting salary ranges: {error}")
+
+def insert_resume_embeddings(resume_embeddings):
+    """Insert or refresh resume embeddings, one row per resume and embedding model"""
+    config = load_config()
+    try:
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                for resume in resume_embeddings:
+                    cur.execute(
+                        """
+                        INSERT INTO resume_embeddings (resume_id, model, content_hash, embedding)
+                        VALUES (%s, %s, %s, %s)
+                        ON CONFLICT (resume_id, model) DO UPDATE
+                        SET content_hash = EXCLUDED.content_hash,
+                            embedding = EXCLUDED.embedding,
+                            created_at = CURRENT_TIMESTAMP;
+                        """, (
+                            resume.get("resume_id"),
+                            resume.get("model"),
+                            resume.get("content_hash"),
+                            list(resume.get("embedding"))
+                        )
+                    )
+
+            conn.commit()
+            print(f"Successfully inserted {len(resume_embeddings)} resume embeddings.")
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error inserting resume embeddings: {error}")
+
+def insert_alert_subscription(resume_id, threshold):
+    """Opt a resume into job alerts, or change its threshold"""
+    config = load_config()
+    try:
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    INSERT INTO alert_subscriptions (resume_id, threshold)
+                    VALUES (%s, %s)
+                    ON CONFLICT (resume_id) DO UPDATE SET threshold = EXCLUDED.threshold;
+                    """, (resume_id, threshold)
+                )
+
+            conn.commit()
+            return True
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error inserting alert subscription: {error}")
+        return False
+
+
+def insert_job_alerts(job_alerts):
+    """Insert alerts (resume_id, job_id, score), a job only alerts a resume once"""
+    config = load_config()
+    try:
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor() as cur:
+                cur.executemany(
+                    """
+                    INSERT INTO job_alerts (resume_id, job_id, score)
+                    VALUES (%s, %s, %s)
+                    ON CONFLICT (resume_id, job_id) DO NOTHING;
+                    """, [(alert["resume_id"], alert["job_id"], alert["score"]) for alert in job_alerts]
+                )
+
+            conn.commit()
+            print(f"Successfully inserted {len(job_alerts)} job alerts.")
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Error inserting job alerts: {error}")
 
 # Use this when you've already scraped the file
 """def main():
@@ -1,5 +1,6 @@
 import psycopg2
 from backend.db.config import  load_config
+from shared.config import Config
 
 # ------ QUERY DATABASE -----
 class QueryDatabase:
@@ -34,12 +35,330 @@ class QueryDatabase:
             return None
 
 
+    def get_parsed_resumes(self, resume_ids):
+        """Retrieve parsed resume data for many resumes in one query, keyed by resume_id"""
+        try:
+            with psycopg2.connect(**self.config) as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT * FROM resume_data WHERE resume_id = ANY(%s);",
+                                (list(resume_ids),))
+
+                    columns = [desc[0] for desc in cur.description]
+                    resumes = dict()
+                    for row in cur.fetchall():
+                        row_dict = dict(zip(columns, row))
+                        resumes[row_dict["resume_id"]] = row_dict
+
+                    return resumes
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print("Database error:", error)
+            return {}
+
+    def get_parsed_resumes_by_hash(self, column, hashes):
+        """Parsed data of the newest resume for each file_hash or text_hash, keyed by hash"""
+        if column not in ("file_hash", "text_hash"):
+            raise ValueError(f"Unknown resume hash column: {column}")
+        try:
+            with psycopg2.connect(**self.config) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        f"""
+                        SELECT DISTINCT ON (r.{column}) r.{column}, rd.*
+                        FROM resumes r
+                        JOIN resume_data rd ON rd.resume_id = r.id
+                        WHERE r.{column} = ANY(%s)
+                        ORDER BY r.{column}, r.id DESC;
+                        """, (list(hashes),))
+
+                    columns = [desc[0] for desc in cur.description][1:]
+                    return {row[0]: dict(zip(columns, row[1:])) for row in cur.fetchall()}
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print("Database error:", error)
+            return {}
+
+    def get_resume_embeddings(self, resume_ids, model):
+        """Retrieve stored resume embeddings as {resume_id: (content_hash, embedding)}"""
+        try:
+            with psycopg2.connect(**self.config) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        """
+                        SELECT resume_id, content_hash, embedding
+                        FROM resume_embeddings
+                        WHERE resume_id = ANY(%s) AND model = %s;
+                        """, (list(resume_ids), model))
+
+                    return {resume_id: (content_hash, embedding)
+                            for resume_id, content_hash, embedding in cur.fetchall()}
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print("Database error:", error)
+            return {}
+
+    def iter_job_embeddings(self, model, chunk_size=Config.DB_CHUNK_SIZE):
+        """
+        Yield every job with its stored embedding for the given embedding model, chunk_size rows at a time.
+        A named (server-side) cursor streams the rows, so they are never all held as Python lists
+        """
+        try:
+            with psycopg2.connect(**self.config) as conn:
+                with conn.cursor(name="job_embeddings_chunks") as cur:
+                    cur.itersize = chunk_size
+                    cur.execute(
+                        """
+                        SELECT jobs.id, jobs.job_id, jobs.title, jobs.description, job_embeddings.embedding
+                        FROM jobs
+                        JOIN job_embeddings ON job_embeddings.job_id = jobs.id
+                        WHERE job_embeddings.model = %s
+                        ORDER BY jobs.id;
+                        """, (model,))
+
+                    while True:
+                        rows = cur.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        yield rows
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print("Database error:", error)
+
+    def get_job_embeddings_by_job_ids(self, job_ids, model):
+        """Retrieve only the given jobs (by job_id) with their stored embeddings"""
+        try:
+            with psycopg2.connect(**self.config) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        """
+                        SELECT jobs.id, jobs.job_id, jobs.title, jobs.description, job_embeddings.embedding
+                        FROM jobs
+                        JOIN job_embeddings ON job_embeddings.job_id = jobs.id
+                        WHERE job_embeddings.model = %s AND jobs.job_id = ANY(%s);
+                        """, (model, list(job_ids)))
+
+                    return cur.fetchall()
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print("Database error:", error)
+            return []
+
+    def get_job_embeddings_version(self, model):
+        """(count, latest created_at) of the stored embeddings, changes whenever a job is embedded or deleted"""
+        try:
+            with psycopg2.connect(**self.config) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        """
+                        SELECT COUNT(*), MAX(created_at)
+                        FROM job_embeddings
+                        WHERE model = %s;
+                        """, (model,))
+
+                    return cur.fetchone()
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print("Database error:", error)
+            return None
+
+    def get_jobs_by_job_ids(self, job_ids):
+        """Retrieve (job_id, title, description) of the given jobs only, e.g. the matched ones"""
+        try:
+            with psycopg2.connect(**self.config) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        """
+                        SELECT job_id, title, description
+                        FROM jobs
+                        WHERE job_id = ANY(%s);
+                        """, (list(job_ids),))
+
+                    return cur.fetchall()
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print("Database error:", error)
+            return []
+
+    def get_job_digests(self, job_ids):
+        """Retrieve job description digests keyed by job_id (the Indeed id), jobs without one are left out"""
+        try:
+            with psycopg2.connect(**self.config) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        """
+                        SELECT jobs.job_id, d.requirements, d.skills, d.seniority, d.years_experience, d.summary
+                        FROM job_digests d
+                        JOIN jobs ON jobs.id = d.job_id
+                        WHERE jobs.job_id = ANY(%s);
+                        """, (list(job_ids),))
+
+                    columns = ["requirements", "skills", "seniority", "years_experience", "summary"]
+                    return {row[0]: dict(zip(columns, row[1:])) for row in cur.fetchall()}
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print("Database error:", error)
+            return {}
+
+    def get_jobs_without_digest(self):
+        """Retrieve id, job_id, title and raw description of jobs that have no digest yet"""
+        try:
+            with psycopg2.connect(**self.config) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        """
+                        SELECT jobs.id, jobs.job_id, jobs.title, jobs.description
+                        FROM jobs
+                        LEFT JOIN job_digests d ON d.job_id = jobs.id
+                        WHERE d.job_id IS NULL;
+                        """)
+
+                    return [dict(zip(["id", "job_id", "title", "description"], row)) for row in cur.fetchall()]
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print("Database error:", error)
+            return []
+
+    def get_job_embedding_hashes(self, model, ids):
+        """Content hash of the stored embedding of the given jobs (by jobs.id) as {id: hash}, jobs not embedded yet are left out"""
+        try:
+            with psycopg2.connect(**self.config) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        """
+                        SELECT job_id, content_hash
+                        FROM job_embeddings
+                        WHERE model = %s AND job_id = ANY(%s);
+                        """, (model, list(ids)))
+
+                    return dict(cur.fetchall())
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print("Database error:", error)
+            return {}
+
+    def get_subscribed_resume_embeddings(self, model):
+        """Retrieve (resume_id, threshold, embedding) for every resume subscribed to job alerts"""
+        try:
+            with psycopg2.connect(**self.config) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        """
+                        SELECT alert_subscriptions.resume_id, alert_subscriptions.threshold, resume_embeddings.embedding
+                        FROM alert_subscriptions
+                        JOIN resume_embeddings ON resume_embeddings.resume_id = alert_subscriptions.resume_id
+                        WHERE resume_embeddings.model = %s;
+                        """, (model,))
+
+                    return cur.fetchall()
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print("Database error:", error)
+            return []
+
+    def get_job_alerts(self, resume_id, unseen_only=False):
+        """Retrieve the job alerts of a resume, newest and best first (reading them does not mark them seen)"""
+        try:
+            with psycopg2.connect(**self.config) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        """
+                        SELECT jobs.job_id, jobs.title, jobs.company, jobs.location,
+                               job_alerts.score, job_alerts.seen, job_alerts.created_at
+                        FROM job_alerts
+                        JOIN jobs ON jobs.id = job_alerts.job_id
+                        WHERE job_alerts.resume_id = %s AND (NOT %s OR NOT job_alerts.seen)
+                        ORDER BY job_alerts.created_at DESC, job_alerts.score DESC;
+                        """, (resume_id, unseen_only))
+
+                    columns = [desc[0] for desc in cur.description]
+                    return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print("Database error:", error)
+            return None
+
+    def mark_job_alerts_seen(self, resume_id, job_ids=None):
+        """Mark the alerts of a resume as seen, only those for job_ids (Indeed ids) if given. Returns how many"""
+        try:
+            with psycopg2.connect(**self.config) as conn:
+                with conn.cursor() as cur:
+                    if job_ids is None:
+                        cur.execute("UPDATE job_alerts SET seen = TRUE WHERE resume_id = %s AND NOT seen;",
+                                    (resume_id,))
+                    else:
+                        cur.execute(
+                            """
+                            UPDATE job_alerts SET seen = TRUE
+                            FROM jobs
+                            WHERE jobs.id = job_alerts.job_id AND job_alerts.resume_id = %s
+                              AND NOT job_alerts.seen AND jobs.job_id = ANY(%s);
+                            """, (resume_id, list(job_ids)))
+
+                    return cur.rowcount
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print("Database error:", error)
+            return None
+
+    def delete_alert_subscription(self, resume_id):
+        """Opt a resume out of job alerts"""
+        try:
+            with psycopg2.connect(**self.config) as conn:
+                with conn.cursor() as cur:
+                    cur.execute("DELETE FROM alert_subscriptions WHERE resume_id = %s;",
+                                (resume_id,))
+
+                    return cur.rowcount > 0
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print("Database error:", error)
+            return None
+
+    def get_job_filter_data(self):
+        """
+        Retrieve the structured job fields used for pre-filtering:
+        jobs (job_id, location, is_expired), job types (job_id, job_type) and salaries (job_id, min, max)
+        """
+        filter_data = {"jobs": [], "job_types": [], "salaries": []}
+        try:
+            with psycopg2.connect(**self.config) as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT job_id, location, is_expired FROM jobs;")
+                    filter_data["jobs"] = cur.fetchall()
+
+                    cur.execute(
+                        """
+                        SELECT jobs.job_id, job_types.job_type
+                        FROM job_job_types
+                        JOIN jobs ON jobs.id = job_job_types.job_id
+                        JOIN job_types ON job_types.id = job_job_types.job_type_id;
+                        """)
+                    filter_data["job_types"] = cur.fetchall()
+
+                    # Yearly figures, so hourly and monthly salaries compare with annual ones.
+                    # salary_range may not exist yet on databases created before it was added to create_tables
+                    cur.execute("SELECT to_regclass('salary_range');")
+                    if cur.fetchone()[0]:
+                        cur.execute(
+                            """
+                            SELECT jobs.job_id, salary_range.annual_min, salary_range.annual_max
+                            FROM salary_range
+                            JOIN jobs ON jobs.id = salary_range.job_id;
+                            """)
+                        filter_data["salaries"] = cur.fetchall()
+
+            return filter_data
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print("Database error:", error)
+            return filter_data
+
     def delete_job(self, job_id):
-        """Delete job from jobs table"""
+        """Delete job from jobs table by its job_id (the Indeed id, as in Elasticsearch and the indexes)"""
         try:
             with psycopg2.connect(**self.config) as conn:
                 with conn.cursor() as cur:
-                    cur.execute("DELETE FROM jobs WHERE ID = %s;",
+                    cur.execute("DELETE FROM jobs WHERE job_id = %s;",
                                 (job_id,))
 
                     deleted_rows = cur.rowcount
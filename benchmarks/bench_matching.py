@@ -0,0 +1,206 @@
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import zlib
+from types import SimpleNamespace
+import numpy as np
+import pandas as pd
+from data_pipeline.data_preprocessing import DataPreprocessing
+from matching_algorithm.embedding_cache import EmbeddingCache
+from matching_algorithm.embedding_client import BatchEmbeddingClient
+from matching_algorithm.embedding_store import JobEmbeddingStore
+from matching_algorithm.similarity_engine import SimilarityEngine
+from matching_algorithm.embedding_file import EmbeddingFile, MappedSimilarityEngine
+from matching_algorithm.ann_index import IVFIndex, recall_at_k
+from matching_algorithm.job_filters import JobFilterIndex
+
+# ------ MATCHING BENCHMARKS ------
+# Synthetic job corpora and a deterministic fake embeddings service, no database, OpenAI or Elasticsearch needed.
+# Run from the project root:
+#   python -m benchmarks.bench_matching --sizes 1000 10000 100000 --output bench_output.json
+
+TITLES = ["software engineer", "data analyst", "machine learning engineer", "backend engineer", "product manager",
+          "frontend developer", "devops engineer", "data scientist", "qa analyst", "cloud architect"]
+SKILLS = ["python", "sql", "java", "aws", "docker", "kubernetes", "react", "pandas", "spark", "tableau", "excel",
+          "typescript", "go", "terraform", "airflow", "pytorch", "tensorflow", "linux", "git", "agile", "jira",
+          "postgresql", "mongodb", "kafka", "graphql", "azure", "gcp", "scala", "rust", "c++"]
+FILLER = ["team", "build", "design", "product", "customers", "scalable", "systems", "collaborate", "deliver",
+          "ownership", "growth", "fast", "paced", "environment", "benefits", "remote", "hybrid", "office"]
+LOCATIONS = ["Toronto, ON", "Vancouver, BC", "Montreal, QC", "Calgary, AB", "Ottawa, ON", "Remote"]
+JOB_TYPES = ["Full-time", "Part-time", "Contract", "Internship"]
+
+MODES = ["exact", "exact-filtered", "mmap-float16", "mmap-int8", "ivf"]
+
+
+class FakeEmbeddingsAPI:
+    """
+    Stands in for client.embeddings.create: deterministic vectors, configurable latency per request.
+    A text's vector is the sum of fixed random vectors of its words, so similar texts get similar vectors
+    """
+    def __init__(self, dims=256, latency=0.05, seed=0):
+        self.dims = dims
+        self.latency = latency
+        self.seed = seed
+        self.word_vectors = dict()
+        self.requests = 0
+
+    def word_vector(self, word):
+        if word not in self.word_vectors:
+            rng = np.random.default_rng(zlib.crc32(word.encode("utf-8")) + self.seed)
+            self.word_vectors[word] = rng.standard_normal(self.dims).astype(np.float32)
+        return self.word_vectors[word]
+
+    def vector(self, text):
+        words = text.split() or [""]
+        return np.sum([self.word_vector(word) for word in words], axis=0)
+
+    def create(self, input, model):
+        time.sleep(self.latency)
+        self.requests += 1
+        texts = [input] if isinstance(input, str) else input
+        return SimpleNamespace(data=[SimpleNamespace(index=i, embedding=self.vector(text).tolist())
+                                     for i, text in enumerate(texts)])
+
+
+def synthetic_jobs(n_jobs, seed=0):
+    """Rows shaped like SELECT id, job_id, title, description, location, is_expired FROM jobs"""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n_jobs):
+        title = TITLES[rng.integers(len(TITLES))]
+        skills = rng.choice(SKILLS, 8, replace=False)
+        words = list(rng.choice(FILLER, 40)) + list(skills)
+        rng.shuffle(words)
+        description = f"We are hiring a {title.title()}! Must know: {', '.join(skills)}. " + " ".join(words) + "."
+        rows.append((i + 1, f"job{i:07d}", title.title(), description,
+                     LOCATIONS[rng.integers(len(LOCATIONS))], bool(rng.random() < 0.1)))
+    return rows
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, round((time.perf_counter() - start) * 1000, 3)
+
+
+def latency_stats(latencies):
+    return {"p50_ms": round(float(np.percentile(latencies, 50)), 3),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+            "mean_ms": round(float(np.mean(latencies)), 3)}
+
+
+def bench_size(n_jobs, args, workdir):
+    result = {"n_jobs": n_jobs, "stages": {}, "modes": {}}
+    rows = synthetic_jobs(n_jobs, args.seed)
+
+    # load: the client side of DataPreprocessing.get_data_from_db (rows -> DataFrame)
+    jobs_df, result["stages"]["load_ms"] = timed(
+        pd.DataFrame, [row[:4] for row in rows], columns=["id", "job_id", "title", "description"])
+
+    jobs_df, result["stages"]["preprocess_ms"] = timed(
+        DataPreprocessing.preprocess_data, jobs_df, ['title', 'description'])
+    job_texts = [JobEmbeddingStore.job_text(title, description)
+                 for title, description in zip(jobs_df['title'], jobs_df['description'])]
+
+    fake_api = FakeEmbeddingsAPI(args.dims, args.latency, args.seed)
+    # No cache tiers, every text goes to the fake service
+    client = BatchEmbeddingClient(max_retries=0, cache=EmbeddingCache(max_items=0, path=""),
+                                  client=SimpleNamespace(embeddings=fake_api))
+    embeddings, result["stages"]["embed_ms"] = timed(client.embed, job_texts)
+    result["stages"]["embed_requests"] = fake_api.requests
+    job_matrix = np.array(embeddings, dtype=np.float32)
+    job_ids = jobs_df['job_id'].to_numpy(dtype=object)
+
+    # Resume-like queries: vectors of random skill and title mixes
+    rng = np.random.default_rng(args.seed + 1)
+    queries = np.array([fake_api.vector(" ".join(list(rng.choice(SKILLS, 10)) + TITLES[rng.integers(len(TITLES))].split()))
+                        for _ in range(args.queries)], dtype=np.float32)
+
+    for mode in args.modes:
+        mode_result = dict()
+        if mode == "exact":
+            engine, mode_result["build_ms"] = timed(SimilarityEngine, job_ids, jobs_df['title'], job_matrix)
+            latencies = [timed(engine.top_k, query, args.k, -1.0)[1] for query in queries]
+
+        elif mode == "exact-filtered":
+            engine = SimilarityEngine(job_ids, jobs_df['title'], job_matrix)
+            filter_index, mode_result["build_ms"] = timed(
+                JobFilterIndex, [(row[1], row[4], row[5]) for row in rows],
+                [(row[1], JOB_TYPES[row[0] % len(JOB_TYPES)]) for row in rows])
+            allowed_ids = filter_index.match(location="Calgary", job_type="Contract", exclude_expired=True)
+            mode_result["filtered_jobs"] = len(allowed_ids)
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                engine.top_k(query, args.k, -1.0, engine.positions_of(filter_index.match(
+                    location="Calgary", job_type="Contract", exclude_expired=True)))
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        elif mode.startswith("mmap-"):
+            dtype = mode.split("-", 1)[1]
+            path = os.path.join(workdir, f"jobs-{n_jobs}-{dtype}.bin")
+            _, mode_result["build_ms"] = timed(EmbeddingFile.write, path, job_ids, jobs_df['title'], job_matrix, dtype)
+            engine = MappedSimilarityEngine(EmbeddingFile.open(path))
+            latencies = [timed(engine.top_k, query, args.k, -1.0)[1] for query in queries]
+            exact = SimilarityEngine(job_ids, job_ids, job_matrix)
+            mode_result["top_k_overlap"] = round(float(np.mean([
+                len(set(m["job_id"] for m in exact.top_k(query, args.k, -1.0))
+                    & set(m["job_id"] for m in engine.top_k(query, args.k, -1.0))) / args.k
+                for query in queries])), 4)
+
+        elif mode == "ivf":
+            index, mode_result["build_ms"] = timed(IVFIndex(n_probe=args.n_probe).build, job_ids, job_matrix)
+            latencies = [timed(index.search, query, args.k)[1] for query in queries]
+            report = recall_at_k(index, job_ids, job_matrix, queries, args.k, (args.n_probe,))
+            mode_result["recall_at_k"] = report[0]["recall_at_k"]
+            mode_result["n_probe"] = args.n_probe
+
+        else:
+            raise ValueError(f"Unknown mode: {mode}")
+
+        mode_result["score"] = latency_stats(latencies)
+        result["modes"][mode] = mode_result
+        print(f"{n_jobs} jobs, {mode}: {mode_result['score']}")
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark load, preprocess, embed and score stages of matching")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="corpus sizes, e.g. 1000 10000 100000 1000000")
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--dims", type=int, default=256, help="embedding dimensions (OpenAI small is 1536)")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake embeddings request latency in seconds")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--n-probe", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "settings": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": []
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        for n_jobs in args.sizes:
+            report["results"].append(bench_size(n_jobs, args, workdir))
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Benchmark report saved to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+import argparse
+import json
+import platform
+import time
+import spacy
+from resume_parser.backup_parser import BackupParser
+from resume_parser.pdf_extraction import PdfTextExtractor
+from shared import nlp_resources
+from shared.config import Config
+
+# ------ SKILL EXTRACTION BENCHMARK ------
+# Compiled pattern automaton against the spaCy pipeline with the skill entity ruler, on the bundled test resume.
+# The ruler pipeline is built here only, the application no longer loads it.
+# Run from the project root:
+#   python -m benchmarks.bench_skills --repeat 200 --output bench_skills.json
+
+TEST_RESUME = "resume_parser/test_resumes/Olivia_Chen_Resume.pdf"
+
+
+def ruler_pipeline():
+    """The previous extraction pipeline: the spaCy model with the skill entity ruler before NER"""
+    nlp = spacy.load(Config.SPACY_MODEL)
+    skill_ruler = nlp.add_pipe("entity_ruler", name="skill_ruler", before="ner")
+    skill_ruler.from_disk(nlp_resources.PATTERNS_DIR / "skill_patterns.jsonl")
+    return nlp
+
+
+def spacy_skills(nlp, text):
+    """SKILL entities found by the ruler pipeline"""
+    return set(ent.text for ent in nlp(text).ents if ent.label_.startswith("SKILL"))
+
+
+def timed(function, texts):
+    start = time.perf_counter()
+    results = [function(text) for text in texts]
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark skill extraction: compiled automaton vs spaCy pipeline")
+    parser.add_argument("--resume", default=TEST_RESUME)
+    parser.add_argument("--repeat", type=int, default=200, help="times the resume text is processed")
+    parser.add_argument("--output", default=None, help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    text = PdfTextExtractor().extract(args.resume)["text"]
+    texts = [text] * args.repeat
+
+    # Loading is not part of the measurement
+    nlp = ruler_pipeline()
+    BackupParser.extract_skills(text)
+
+    spacy_results, spacy_seconds = timed(lambda t: spacy_skills(nlp, t), texts)
+    automaton_results, automaton_seconds = timed(lambda t: set(BackupParser.extract_skills(t)), texts)
+
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "resume": args.resume,
+        "repeat": args.repeat,
+        "spacy_seconds": round(spacy_seconds, 4),
+        "automaton_seconds": round(automaton_seconds, 4),
+        "speedup": round(spacy_seconds / automaton_seconds, 1) if automaton_seconds else None,
+        "same_output": spacy_results[0] == automaton_results[0],
+        "skills": sorted(automaton_results[0])
+    }
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Benchmark report saved to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
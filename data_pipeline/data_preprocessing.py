@@ -4,11 +4,30 @@ import pandas as pd
 import re
 from backend.db.config import load_config
 from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+from shared import nlp_resources
+from shared.config import Config
 
 # ------ PREPROCESSING DATA FOR ANALYSIS AND ML TRAINING -------
 
+SPECIAL_CHARACTERS = re.compile(r'[^a-zA-Z0-9\s]')
+
+# Salary amounts: "$50,000", "$ 22.50", "$60K" or "50,000 CAD"
+SALARY_AMOUNT = re.compile(r'\$\s*(?P<dollars>\d[\d,]*(?:\.\d+)?)(?P<thousands>\s*k\b)?'
+                           r'|(?P<currency>\d+(?:,\d{3})*(?:\.\d+)?)\s*(?:dollars|usd|cad)', re.IGNORECASE)
+# Pay period -> periods per year (40 hour weeks, 52 weeks)
+SALARY_PERIODS = {"hour": 2080, "day": 260, "week": 52, "month": 12, "year": 1}
+# The period written right after an amount ("$22.50 an hour", "$4,000 per month", "$60K annually")
+SALARY_PERIOD_AFTER_AMOUNT = re.compile(
+    r'\d(?:[\d,]*(?:\.\d+)?)\s*k?\s*(?:(?:an?|per|/)\s*(?P<unit>hour|hr|day|week|month|year|annum)\b'
+    r'|(?P<adverb>hourly|daily|weekly|monthly|yearly|annually)\b)', re.IGNORECASE)
+PERIOD_WORDS = {"hour": "hour", "hr": "hour", "hourly": "hour", "day": "day", "daily": "day", "week": "week",
+                "weekly": "week", "month": "month", "monthly": "month", "year": "year", "annum": "year",
+                "yearly": "year", "annually": "year"}
+# Otherwise any mention of a period, yearly first like extract_salary_range
+# ("$50,000 a year, 40 hours per week" is a yearly salary)
+SALARY_PERIOD_PATTERNS = {"year": r"year|annual|annum", "month": r"month", "week": r"week",
+                          "day": r"\bday|daily", "hour": r"hour|\bhr\b"}
+
 # Necessary downloads for NLTK
 #.download("stopwords")
 #nltk.download("punkt_tab")
@@ -23,42 +42,60 @@ class DataPreprocessing:
         """Fetch data from database
         columns is a list of columns to find
         table_name is a string of the table to find it in"""
-        config = load_config()
-        column_str = ", ".join(columns)
+        # Built from chunks, so the rows are only held as tuples one chunk at a time. The chunks and the
+        # concatenated DataFrame still exist together (about twice the table at peak), callers that can
+        # work chunk by chunk should use iter_data_from_db instead
         try:
-            with psycopg2.connect(**config) as conn:
-                with conn.cursor() as cur:
-                    query = f"SELECT {column_str} FROM {table_name};"
-                    cur.execute(query)
-                    rows = cur.fetchall() # returns a list of tuple
-
-                    # Create an empty Dataframe
-                    df = pd.DataFrame(rows, columns=columns)
-                    return df
+            chunks = list(DataPreprocessing.iter_data_from_db(columns, table_name))
         except (Exception, psycopg2.DatabaseError) as error:
             print(f"Error getting data from {table_name}: ",error)
             return pd.DataFrame()
 
+        if not chunks:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(chunks, ignore_index=True)
+
+    @staticmethod
+    def iter_data_from_db(columns, table_name, chunk_size=Config.DB_CHUNK_SIZE):
+        """Yield the table as DataFrames of at most chunk_size rows.
+        A named (server-side) cursor streams the rows, so memory use does not grow with the table"""
+        config = load_config()
+        column_str = ", ".join(columns)
+        with psycopg2.connect(**config) as conn:
+            with conn.cursor(name=f"{table_name}_chunks") as cur:
+                cur.itersize = chunk_size
+                cur.execute(f"SELECT {column_str} FROM {table_name};")
+                while True:
+                    rows = cur.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield pd.DataFrame(rows, columns=columns)
+
     @staticmethod
     def remove_special_characters(text):
         """Removes special characters and punctuation from text"""
-        return re.sub(r'[^a-zA-Z0-9\s]', '', str(text))
+        return SPECIAL_CHARACTERS.sub('', str(text))
 
     @staticmethod
     def preprocess_data(df, columns):
         """Clean the data"""
         # Remove special characters and punctuation from the data
         # Convert to lowercase
-        #columns = ["title", "description"]
+        # Whole columns at once, same result as remove_special_characters on every cell
         for column in columns:
-            df[column] = df[column].apply(DataPreprocessing.remove_special_characters)
-            df[column] = df[column].str.lower()
+            df[column] = df[column].map(str).str.replace(SPECIAL_CHARACTERS, '', regex=True).str.lower()
 
         # Fill every missing value in the table
         df.fillna("not specified", inplace=True)
 
         return df
 
+    @staticmethod
+    def iter_preprocessed_data(columns, table_name, text_columns, chunk_size=Config.DB_CHUNK_SIZE):
+        """Stream a table chunk by chunk and clean text_columns of every chunk"""
+        for chunk in DataPreprocessing.iter_data_from_db(columns, table_name, chunk_size):
+            yield DataPreprocessing.preprocess_data(chunk, text_columns)
+
     @staticmethod
     def text_preprocessing(text):
         """Prepare text data for analysis and search"""
@@ -66,15 +103,15 @@ class DataPreprocessing:
         # Tokenize the text, word
         token = word_tokenize(text)
 
-        # Remove stopwords
-        stop_words = set(stopwords.words(["english", "french"]))
+        # Remove stopwords (loaded once per process)
+        stop_words = nlp_resources.stop_words()
         filtered_list = []
         for word in token:
             if word.casefold() not in stop_words:
                 filtered_list.append(word)
 
         # Lemmatize the words
-        lemmatizer = WordNetLemmatizer()
+        lemmatizer = nlp_resources.lemmatizer()
         lemmatized_words = []
 
         for word in filtered_list:
@@ -102,12 +139,55 @@ class DataPreprocessing:
 
         # Clean and convert extracted salaries to integers
         salaries_cleaned = [float(re.sub(r"[$,USD,CAD\s]", "", salary)) for salary in salaries]
+        if not salaries_cleaned:
+            return None, None, frequency
 
         min_salary = min(salaries_cleaned)
         max_salary = max(salaries_cleaned)
 
         return min_salary, max_salary, frequency
 
+    @staticmethod
+    def normalize_salaries(salaries):
+        """
+        Feature Extraction for a whole Series of salary strings at once.
+        Returns a DataFrame on the same index with min_salary, max_salary, frequency
+        and annual_min / annual_max (the range as a yearly figure, NaN when it cannot be told)
+        """
+        salaries = pd.Series(salaries, dtype=object).where(pd.notna(salaries), "").astype(str)
+        lower = salaries.str.lower()
+
+        # The period next to an amount, else the first of SALARY_PERIOD_PATTERNS that is mentioned
+        nearest = salaries.str.extract(SALARY_PERIOD_AFTER_AMOUNT)
+        frequency = nearest["unit"].fillna(nearest["adverb"]).str.lower().map(PERIOD_WORDS).astype(object)
+        for period, pattern in SALARY_PERIOD_PATTERNS.items():
+            frequency = frequency.mask(frequency.isna() & lower.str.contains(pattern, regex=True), period)
+
+        # Every amount of every salary in one pass, then min and max per salary
+        amounts = salaries.str.extractall(SALARY_AMOUNT)
+        values = amounts["dollars"].fillna(amounts["currency"]).str.replace(",", "", regex=False).astype(float)
+        values = values.where(amounts["thousands"].isna(), values * 1000)
+        grouped = values.groupby(level=0)
+
+        result = pd.DataFrame({
+            "min_salary": grouped.min().reindex(salaries.index),
+            "max_salary": grouped.max().reindex(salaries.index),
+            "frequency": frequency
+        })
+
+        # No period given: only amounts that can only be yearly are annualized
+        factor = result["frequency"].map(SALARY_PERIODS).astype(float)
+        factor = factor.where(factor.notna() | (result["max_salary"] < 10000), 1.0)
+        annual_min = result["min_salary"] * factor
+        annual_max = result["max_salary"] * factor
+
+        # A yearly figure outside a plausible range means the string was misread, it is not stored
+        plausible = annual_min.between(Config.SALARY_ANNUAL_MIN, Config.SALARY_ANNUAL_MAX) & \
+            annual_max.between(Config.SALARY_ANNUAL_MIN, Config.SALARY_ANNUAL_MAX)
+        result["annual_min"] = annual_min.where(plausible)
+        result["annual_max"] = annual_max.where(plausible)
+        return result
+
     #REMOVE METHOD LATER
     @staticmethod
     def save_preprocessed_data(df):
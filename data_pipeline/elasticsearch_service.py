@@ -84,7 +84,8 @@ class ElasticsearchService:
         config = load_config()
         try:
             with psycopg2.connect(**config) as conn:
-                with conn.cursor() as cur:
+                # Named cursor: rows are streamed from the server batch_size at a time instead of all at once
+                with conn.cursor(name="es_jobs") as cur:
                     cur.itersize = batch_size
                     cur.execute("""SELECT job_id, title, description, company, location, salary, date_posted FROM jobs;""")
 
@@ -115,21 +116,26 @@ class ElasticsearchService:
             print(f"Bulk indexing error: {e}")
 
     def update_es(self, new_jobs):
-        """Bulk insert new jobs to Elasticsearch"""
+        """Bulk insert new jobs to Elasticsearch
+        new_jobs are raw Apify items (id, positionName, postingDateParsed) or rows named like the jobs table"""
         actions = []
 
         for job in new_jobs:
+            # Hybrid matching reads candidate ids from _source.job_id, it must be the Indeed id
+            job_id = job.get("job_id") or job.get("id")
+            if not job_id:
+                continue
             actions.append({
                 "_index": self.index_name,
-                "_id": job.get("job_id"),
+                "_id": job_id,
                 "_source": {
-                    "job_id": job.get("job_id", ""),
-                    "title": job.get("title", ""),
+                    "job_id": job_id,
+                    "title": job.get("title") or job.get("positionName", ""),
                     "description": job.get("description", ""),
                     "company": job.get("company", ""),
                     "location": job.get("location", ""),
                     "salary": job.get("salary", ""),
-                    "date_posted": job.get("date_posted", ""),
+                    "date_posted": job.get("date_posted") or job.get("postingDateParsed", ""),
                 }
             })
         try:
@@ -166,6 +172,33 @@ class ElasticsearchService:
         response = self.es.search(index=self.index_name, size=size, query=query)
         return [hit["_source"] for hit in response["hits"]["hits"]]
 
+    def search_candidate_jobs(self, skills, positions, size=200):
+        """
+        BM25 candidate generation for matching: jobs whose title or description mention
+        the resume's skills or recent positions. Returns (job_id, score) pairs, best first
+        """
+        should = []
+        if skills:
+            should.append({
+                "multi_match": {
+                    "query": " ".join(skills),
+                    "fields": ["title^2", "description"]
+                }
+            })
+        for position in positions:
+            should.append({"match": {"title": {"query": position, "boost": 3}}})
+
+        if not should:
+            return []
+
+        query = {"bool": {"should": should, "minimum_should_match": 1}}
+        try:
+            response = self.es.search(index=self.index_name, size=size, query=query, source=["job_id"])
+            return [(hit["_source"]["job_id"], hit["_score"]) for hit in response["hits"]["hits"]]
+        except Exception as e:
+            print(f"Error searching candidate jobs: {e}")
+            return []
+
     def delete_job(self, job_id):
         """Delete job from index"""
         try:
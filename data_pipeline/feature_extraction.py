@@ -1,41 +1,37 @@
 # ----- Feature Extraction SQL Processes ------
 
-import psycopg2
-from backend.db.config import load_config
-
-
-# move to create-tables.py
-create_salary_range = """
-CREATE TABLE IF NOT EXISTS salary_range (
-    id SERIAL PRIMARY KEY,
-    job_id INTEGER NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
-    min_salary FLOAT,
-    max_salary FLOAT,
-    frequency VARCHAR(30)
-    )
-"""
-# move to insert.py
-insert_sr_data = """
-INSERT INTO salary_range (job_id, min_salary, max_salary, frequency)
-VALUES (%s, %s, %s, %s);
-"""
+import pandas as pd
+from backend.db.insert import insert_salary_ranges
+from data_pipeline.data_preprocessing import DataPreprocessing
+
+SALARY_COLUMNS = ["min_salary", "max_salary", "frequency", "annual_min", "annual_max"]
+
 
 def salary_range_feature(salary_range):
-    config = load_config()
-    try:
-        with psycopg2.connect(**config) as conn:
-            with conn.cursor() as cur:
-                # Create Table first
-                cur.execute(create_salary_range)
-
-                # Now insert data into table
-                for _, row in salary_range.iterrows():
-                    cur.execute(insert_sr_data,(row["id"], row["min_salary"],
-                                                 row["max_salary"], row["frequency"]))
-
-                # commit the changes to the database
-                conn.commit()
-                print(f"Successfully created salary range")
-
-    except (Exception, psycopg2.DatabaseError) as error:
-         print(error)
\ No newline at end of file
+    """Store a salary_range DataFrame (id plus SALARY_COLUMNS), NaN is stored as NULL"""
+    salary_range = salary_range[["id"] + SALARY_COLUMNS].astype(object)
+    insert_salary_ranges(salary_range.where(pd.notna(salary_range), None).to_dict(orient="records"))
+
+
+def salary_features(jobs):
+    """Parse and store the salary of new jobs (dicts with id and salary, e.g. rows returned by insert_jobs)"""
+    if not jobs:
+        return
+    salary_range = DataPreprocessing.normalize_salaries(pd.Series([job.get("salary") for job in jobs]))
+    salary_range.insert(0, "id", [job["id"] for job in jobs])
+    salary_range_feature(salary_range)
+
+
+def backfill_salary_ranges():
+    """Parse the salary of every job, the jobs table is streamed in chunks"""
+    total = 0
+    for jobs_df in DataPreprocessing.iter_data_from_db(["id", "salary"], "jobs"):
+        salary_range = DataPreprocessing.normalize_salaries(jobs_df["salary"])
+        salary_range.insert(0, "id", jobs_df["id"])
+        salary_range_feature(salary_range)
+        total += len(jobs_df)
+    print(f"Parsed the salary of {total} jobs")
+
+
+if __name__ == '__main__':
+    backfill_salary_ranges()
@@ -0,0 +1,152 @@
+import re
+from collections import Counter
+from shared.config import Config
+from resume_parser.backup_parser import BackupParser
+
+# ------ JOB DESCRIPTION DIGESTS ------
+
+# (level, pattern) checked in order, the title is searched before the description
+SENIORITY_PATTERNS = (
+    ("intern", r"\b(intern|internship|co-?op|student)\b"),
+    ("manager", r"\b(manager|director|head of|vp)\b"),
+    ("lead", r"\b(lead|principal|staff|architect)\b"),
+    ("senior", r"\b(senior|sr)\b"),
+    ("junior", r"\b(junior|jr|entry[- ]level|new grad|graduate)\b"),
+)
+
+REQUIREMENT_CUES = re.compile(
+    r"\b(require[ds]?|requirements?|must|qualifications?|experience (with|in)|years?|degree|bachelor|master|"
+    r"proficien\w*|knowledge of|familiar\w*|ability to|strong|understanding of|certifi\w*)\b", re.IGNORECASE)
+
+# "3 years", "5+ years", "5-7 years", "3 to 5 years"; a number inside a longer one (e.g. 2021) is not read
+YEARS_PATTERN = re.compile(r"(?<![\d.,])\b(\d{1,2})(?:\s*(?:-|–|to)\s*(\d{1,2}))?\s*\+?\s*years?\b", re.IGNORECASE)
+MAX_YEARS = 30
+
+# Requirement sentences are stored cut to this length
+REQUIREMENT_MAX_CHARS = 200
+
+STOP_WORDS = set("""a an and are as at be by for from has have in is it its of on or our the their this to we will
+with you your who what which all any can may more other such than that these they us not but also""".split())
+
+
+class JobDigest:
+    """
+    Compact, extractive digest of a job description, built once at ingestion:
+    requirement sentences, skills, seniority and a capped-length summary.
+    Recommendation prompts use it instead of the raw description
+    """
+    def __init__(self, max_requirements=Config.JOB_DIGEST_MAX_REQUIREMENTS,
+                 summary_chars=Config.JOB_DIGEST_SUMMARY_CHARS):
+        self.max_requirements = max_requirements
+        self.summary_chars = summary_chars
+
+    def build(self, title, description, skills=None):
+        """
+        Digest of one job as a dict (requirements, skills, seniority, years_experience, summary),
+        skills can be passed in when they were extracted for a batch of jobs
+        """
+        description = str(description or "")
+        sentences = self.split_sentences(description)
+        years = self.years_experience(description)
+
+        requirements = self.requirements(sentences)
+
+        return {
+            "requirements": requirements,
+            "skills": skills if skills is not None else self.skills(f"{title} {description}"),
+            "seniority": self.seniority(str(title or ""), description, years),
+            "years_experience": years,
+            # The requirements are already in the digest, summarize the rest
+            "summary": self.summary([sentence for sentence in sentences
+                                     if sentence[:REQUIREMENT_MAX_CHARS] not in requirements])
+        }
+
+    def build_many(self, jobs):
+        """Digests for job dicts with id, title and description (e.g. rows returned by insert_jobs)"""
+        # The texts of all jobs are tokenized in one batch for the skill patterns
+        skills = BackupParser.extract_skills_many(f"{job['title']} {job['description'] or ''}" for job in jobs)
+        return [{"id": job["id"], **self.build(job["title"], job["description"], self.canonical_skills(job_skills))}
+                for job, job_skills in zip(jobs, skills)]
+
+    @staticmethod
+    def split_sentences(text):
+        """Sentences and bullet points, whitespace collapsed"""
+        parts = re.split(r"(?<=[.!?])\s+|\n+|\s*[•·▪●*]\s+|\s+-\s+", text)
+        return [re.sub(r"\s+", " ", part).strip(" -:;") for part in parts if len(part.strip()) > 3]
+
+    def requirements(self, sentences, max_chars=REQUIREMENT_MAX_CHARS):
+        found = []
+        for sentence in sentences:
+            # Compared as stored, cut to max_chars
+            requirement = sentence[:max_chars]
+            if REQUIREMENT_CUES.search(sentence) and requirement not in found:
+                found.append(requirement)
+                if len(found) >= self.max_requirements:
+                    break
+        return found
+
+    def skills(self, text):
+        """Skills found by the resume parser's skill patterns (skill_patterns.jsonl)"""
+        return self.canonical_skills(BackupParser.extract_skills(text))
+
+    @staticmethod
+    def canonical_skills(skills):
+        """Lowercased, without duplicates, sorted so the stored digest does not change between runs"""
+        return sorted(set(skill.lower() for skill in skills))
+
+    @staticmethod
+    def years_experience(text):
+        """Most years of experience asked for (the upper end of a range), None if not stated"""
+        years = [int(value) for match in YEARS_PATTERN.findall(text) for value in match if value]
+        years = [value for value in years if 0 < value <= MAX_YEARS]
+        return max(years) if years else None
+
+    @staticmethod
+    def seniority(title, description, years):
+        for text in (title, description):
+            for level, pattern in SENIORITY_PATTERNS:
+                if re.search(pattern, text, re.IGNORECASE):
+                    return level
+        if years is None:
+            return "not specified"
+        if years < 2:
+            return "junior"
+        if years < 5:
+            return "mid"
+        return "senior"
+
+    def summary(self, sentences):
+        """
+        Highest scoring sentences (content word frequency, earlier sentences favoured)
+        in their original order, up to summary_chars characters
+        """
+        words = [re.findall(r"[a-z0-9+#]+", sentence.lower()) for sentence in sentences]
+        frequency = Counter(word for sentence_words in words for word in sentence_words if word not in STOP_WORDS)
+        if not frequency:
+            return ""
+
+        scores = []
+        for i, sentence_words in enumerate(words):
+            content = [word for word in sentence_words if word not in STOP_WORDS]
+            score = sum(frequency[word] for word in content) / (len(content) ** 0.5 or 1)
+            scores.append(score / (1 + 0.05 * i))
+
+        chosen, length = [], 0
+        for i in sorted(range(len(sentences)), key=lambda i: scores[i], reverse=True):
+            if length + len(sentences[i]) > self.summary_chars:
+                continue
+            chosen.append(i)
+            length += len(sentences[i]) + 1
+
+        if not chosen:
+            return sentences[0][:self.summary_chars]
+        return " ".join(sentences[i] for i in sorted(chosen))
+
+
+if __name__ == '__main__':
+    # Digest every job that does not have one yet
+    from backend.db.utils import QueryDatabase
+    from backend.db.insert import insert_job_digests
+
+    jobs = QueryDatabase().get_jobs_without_digest()
+    insert_job_digests(JobDigest().build_many(jobs))
@@ -1,10 +1,14 @@
 import streamlit as st
 import json
+import time
 import requests
 import pandas as pd
 
 st.set_page_config(layout="wide")
 
+# seconds the page waits for a queued resume before giving up
+TASK_POLL_TIMEOUT = 600
+
 st.title("Job Match")
 st.markdown("Job Matching System. Upload the resume to see if the candidate matches with any job in the system")
 st.divider()
@@ -24,17 +28,35 @@ if uploaded_file and not st.session_state.process_done:
             files = {"file": (uploaded_file.name, uploaded_file, "application/pdf")}
             response = requests.post(url= "http://127.0.0.1:8000/resumes", files=files)
 
-            if response.status_code == 200:
+            if response.status_code in (200, 202):
+                # Parsing runs in the background, poll the task until it is done
+                # (a resume that was parsed before comes back right away)
                 data = response.json()
-                st.success("Resume parsed successfully!")
-
-                # Save in session state
-                st.session_state["parsed_data"] = data["parsed_data"]
-                st.session_state["resume_id"] = data["parsed_data"]["resume_id"]
-
-                # so that the match button can show
-                st.session_state["process_done"] = True
-                st.rerun() # Rerun to update the UI
+                task_id = data["task_id"]
+                data["status"] = "queued" if task_id else "done"
+                deadline = time.monotonic() + TASK_POLL_TIMEOUT
+                while data["status"] in ("queued", "running") and time.monotonic() < deadline:
+                    time.sleep(1)
+                    task_response = requests.get(url= f"http://127.0.0.1:8000/resumes/tasks/{task_id}", timeout=30)
+                    if task_response.status_code != 200:
+                        data = {"status": "failed", "error": f"{task_response.status_code} {task_response.text}"}
+                        break
+                    data = task_response.json()
+
+                if data["status"] in ("queued", "running"):
+                    st.error(f"Resume is still {data['status']} after {TASK_POLL_TIMEOUT} seconds, try again later")
+                elif data["status"] == "done":
+                    st.success("Resume parsed successfully!")
+
+                    # Save in session state
+                    st.session_state["parsed_data"] = data["parsed_data"]
+                    st.session_state["resume_id"] = data["parsed_data"]["resume_id"]
+
+                    # so that the match button can show
+                    st.session_state["process_done"] = True
+                    st.rerun() # Rerun to update the UI
+                else:
+                    st.error(f"Error parsing resume: {data['error']}")
             else:
                 st.error(f"Error: {response.status_code}")
                 st.text(response.text)
@@ -85,23 +107,38 @@ if st.session_state.process_done:
             # Get the resume id
             resume_id = st.session_state.get("resume_id")
 
-            # Send the request to FASTAPI
-            response = requests.post(url= f"http://127.0.0.1:8000/match_candidate/{resume_id}")
+            # Stream the result from FASTAPI, recommendations show up one job at a time
+            response = requests.post(url= f"http://127.0.0.1:8000/match_candidate/{resume_id}/stream", stream=True)
 
             if response.status_code == 200:
-                data = response.json()
-                st.success("Matching Algorithm Complete.")
-
-                # save to session state
-                st.session_state['top_matches'] = data["top_matches"]
-
-                # if there were any top matches, the recommendations will be part of the result
-                data.get("recommendations", 0)
-
-                if data["recommendations"] != 0:
-                    st.session_state["recommendations"] = data["recommendations"]
-                else:
+                recommendation_area = st.container()
+                event = None
+                done = None
+                for line in response.iter_lines(decode_unicode=True):
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                    elif line.startswith("data: "):
+                        data = json.loads(line[len("data: "):])
+                        if event == "matches":
+                            st.success("Matching Algorithm Complete.")
+                            # save to session state
+                            st.session_state['top_matches'] = data
+                        elif event == "recommendation":
+                            with recommendation_area.container(border=True):
+                                st.markdown(f"**{data.get('title', data['job_id'])}**")
+                                st.markdown(data.get('similarity_reason', ''))
+                        elif event == "error":
+                            st.error(data)
+                        elif event == "done":
+                            done = data
+
+                if done and done["content"]:
+                    st.session_state["recommendations"] = done
+                    # switch to results page
+                    st.switch_page("pages/2_Job_Results.py")
+                elif done:
                     st.session_state["recommendations"] = "No jobs to recommend."
-
-                # switch to results page
-                st.switch_page("pages/2_Job_Results.py")
\ No newline at end of file
+                    st.info("No strong matches found for this candidate.")
+            else:
+                st.error(f"Error: {response.status_code}")
+                st.text(response.text)
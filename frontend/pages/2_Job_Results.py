@@ -13,19 +13,22 @@ st.divider()
 
 st.subheader("Recommendation")
 data = st.session_state.get("recommendations")
-# returns a string so change to dictionary
-recommendation = json.loads(data['content'])
-#st.write(recommendation) # check
+# returns a string so change to dictionary (a list of them in fan-out mode)
+recommendations = json.loads(data['content'])
+if not isinstance(recommendations, list):
+    recommendations = [recommendations]
+#st.write(recommendations) # check
 
-st.markdown(f"**{recommendation['title']}**")
-st.markdown(f"{recommendation['similarity_reason']}")
-st.markdown(f"**Strengths:**")
-strengths = recommendation['strengths']
-for str in strengths:
-    st.markdown(f"* {strengths[str]}")
-st.markdown(f"**Weaknesses:**")
-weakness = recommendation['weaknesses']
-for weak in weakness:
-    st.markdown(f"* {weakness[weak]}")
+for recommendation in recommendations:
+    st.markdown(f"**{recommendation['title']}**")
+    st.markdown(f"{recommendation['similarity_reason']}")
+    st.markdown(f"**Strengths:**")
+    strengths = recommendation['strengths']
+    for str in strengths:
+        st.markdown(f"* {strengths[str]}")
+    st.markdown(f"**Weaknesses:**")
+    weakness = recommendation['weaknesses']
+    for weak in weakness:
+        st.markdown(f"* {weakness[weak]}")
 
-st.divider()
\ No newline at end of file
+    st.divider()
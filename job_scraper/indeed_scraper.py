@@ -2,8 +2,12 @@ import asyncio
 import os
 from dotenv import load_dotenv
 from apify_client import ApifyClientAsync
-from backend.db.insert import insert_jobs
+from backend.db.insert import insert_jobs, insert_job_digests
+from data_pipeline.job_digest import JobDigest
+from data_pipeline.feature_extraction import salary_features
 from data_pipeline.elasticsearch_service import ElasticsearchService
+from matching_algorithm.embedding_store import JobEmbeddingStore
+from matching_algorithm.job_alerts import JobAlerts
 
 load_dotenv()
 
@@ -53,7 +57,21 @@ class IndeedScraper:
 
             # Export to PostgreSQL database
             print(f"Fetched {len(job_data)} job records for position '{position}'. Inserting into database...")
-            insert_jobs(job_data)
+            new_jobs = insert_jobs(job_data)
+
+            # Digest the new descriptions once, recommendation prompts use the digest
+            insert_job_digests(JobDigest().build_many(new_jobs))
+
+            # Numeric, yearly salary ranges for filtering and sorting
+            salary_features(new_jobs)
+
+            # Embed only the newly inserted jobs so matching never has to
+            embedding_store = JobEmbeddingStore()
+            job_embeddings = embedding_store.embed_jobs(new_jobs)
+
+            # Alert subscribed resumes about the new jobs only
+            job_alerts = JobAlerts()
+            job_alerts.score_new_jobs(job_embeddings)
 
             # Export to Elasticsearch
             es = ElasticsearchService()
@@ -1,13 +1,49 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException, Query
-from resume_parser.ai_resume_parser import ResumeParser
+import json
+import threading
+from typing import List, Optional
+from fastapi import FastAPI, UploadFile, File, HTTPException, Query, Body
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse, JSONResponse
+from resume_parser.ingestion_queue import ResumeIngestionQueue, QueueFullError
+from resume_parser.bulk_ingest import BulkResumeIngest, ArchiveTooLargeError
+from resume_parser.pdf_extraction import PdfTextExtractor, shutdown_pool
+from resume_parser import resume_dedup
 from matching_algorithm.matching_system import MatchingAlgorithm
 from matching_algorithm.recommendation_system import Recommendation
+from matching_algorithm.embedding_store import JobEmbeddingStore
+from matching_algorithm.embedding_cache import EmbeddingCache
+from matching_algorithm.recommendation_cache import RecommendationCache
+from matching_algorithm.job_alerts import JobAlerts
+from matching_algorithm.embedding_providers import get_embedding_provider
 from data_pipeline.elasticsearch_service import ElasticsearchService
 from job_scraper.indeed_scraper import IndeedScraper
 from backend.db.utils import QueryDatabase
+from shared.config import Config
+from shared import nlp_resources
 
 app = FastAPI()
 
+
+# load the embedding backend once per worker (the local model is read from disk here)
+@app.on_event("startup")
+def load_embedding_backend():
+    get_embedding_provider()
+
+
+# resume parsing runs on these threads, not on the request
+@app.on_event("startup")
+def start_resume_workers():
+    # load the fallback parser's spaCy and NLTK assets in the background, not on the first resume
+    if Config.NLP_WARMUP:
+        threading.Thread(target=nlp_resources.warm, daemon=True).start()
+    ResumeIngestionQueue.shared().start()
+
+
+@app.on_event("shutdown")
+def stop_resume_workers():
+    ResumeIngestionQueue.shared().stop()
+    shutdown_pool()
+
 # NEXT TASKS TO COMPLETE
 # add search filters to /jobs
 # validate input, make sure that resume upload is pdf
@@ -17,23 +53,74 @@ app = FastAPI()
 def home():
     pass
 
-# parse resume and show parsed data
-@app.post("/resumes")
-def upload_resume(file: UploadFile = File(...)):
+# queue a resume for parsing, poll /resumes/tasks/{task_id} for the parsed data
+# a file that was parsed before comes back right away, unless force is set
+@app.post("/resumes", status_code=202)
+def upload_resume(file: UploadFile = File(...), force: bool = Query(False)):
+    try:
+        # The upload stays in its spooled temp file, it is hashed and saved without reading it into memory
+        if PdfTextExtractor.size_of(file.file) > Config.PDF_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"Resume is larger than {Config.PDF_MAX_BYTES} bytes.")
+        if not force:
+            existing = resume_dedup.find_parsed_resume("file_hash", resume_dedup.file_hash(file.file))
+            if existing:
+                return JSONResponse(status_code=200, content=jsonable_encoder({
+                    "message": "Resume was already parsed.",
+                    "task_id": None,
+                    "parsed_data": existing
+                }))
+
+        task_id = ResumeIngestionQueue.shared().enqueue(file.filename, file.file, force)
+
+        return {
+            "message": "Resume queued for parsing.",
+            "task_id": task_id
+        }
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error queueing resume: {e}")
+
+# status of a queued resume: queued, running, done (with parsed_data) or failed
+@app.get("/resumes/tasks/{task_id}")
+def resume_task_status(task_id: int):
+    task = ResumeIngestionQueue.shared().get_task(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Resume task not found.")
+
+    return {
+        "message": "Resume task status",
+        "task_id": task["id"],
+        "filename": task["filename"],
+        "status": task["status"],
+        "error": task["error"],
+        "parsed_data": task["result"] if task["status"] == "done" else None
+    }
+
+# parse many resumes at once (pdf files and/or zip archives of pdfs), reports an outcome per file
+@app.post("/resumes/bulk")
+def upload_resumes_bulk(files: List[UploadFile] = File(...), force: bool = Query(False)):
     try:
-        parser = ResumeParser(file.file)
-        parsed_data = parser.run()
+        bulk_ingest = BulkResumeIngest()
+        result = bulk_ingest.run([(file.filename, file.file.read()) for file in files], force=force)
 
         return {
-            "message": "Resume parsed successfully.",
-            "parsed_data": parsed_data
+            "message": f"Parsed {result['summary']['parsed']} of {result['summary']['files']} resumes.",
+            **result
         }
+    except ArchiveTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error parsing resume: {e}")
+        raise HTTPException(status_code=500, detail=f"Error parsing resumes: {e}")
 
 # matching algorithm and recommendation system of parsed data
 @app.post("/match_candidate/{resume_id}")
-def match_candidate(resume_id):
+def match_candidate(resume_id, hybrid: bool = Query(False), fuse: bool = Query(False),
+                    location: str = Query(None), job_type: str = Query(None),
+                    salary_min: float = Query(None), salary_max: float = Query(None),
+                    exclude_expired: bool = Query(False), fan_out: bool = Query(False)):
     try:
         # get parsed data from database
         db_query = QueryDatabase()
@@ -44,7 +131,14 @@ def match_candidate(resume_id):
 
         # run the matching algorithm
         matcher = MatchingAlgorithm()
-        top_matches = matcher.run(parsed_data)
+        filters = {
+            "location": location,
+            "job_type": job_type,
+            "salary_min": salary_min,
+            "salary_max": salary_max,
+            "exclude_expired": exclude_expired
+        }
+        top_matches = matcher.run(parsed_data, hybrid=hybrid, fuse=fuse, filters=filters)
 
         if top_matches["top_matches"] == "No strong matches found for this candidate.":
             # No need to run recommendation
@@ -54,7 +148,8 @@ def match_candidate(resume_id):
             }
         # run the recommendation system
         recommend = Recommendation()
-        top_recommendations = recommend.run(top_matches)
+        # fan_out: one concurrent request per matched job instead of one long prompt
+        top_recommendations = recommend.run(top_matches, fan_out=fan_out)
 
         return {
             "message": "Matching algorithm ran successfully.",
@@ -67,6 +162,147 @@ def match_candidate(resume_id):
         raise HTTPException(status_code=500, detail=f"Error running matching algorithm: {e}")
 
 
+# same as /match_candidate, but the recommendation is streamed as server-sent events:
+# "matches" first, then "token" deltas, a "recommendation" event per job as soon as it is parsed, and "done"
+@app.post("/match_candidate/{resume_id}/stream")
+def match_candidate_stream(resume_id, hybrid: bool = Query(False), fuse: bool = Query(False),
+                           location: str = Query(None), job_type: str = Query(None),
+                           salary_min: float = Query(None), salary_max: float = Query(None),
+                           exclude_expired: bool = Query(False)):
+    try:
+        db_query = QueryDatabase()
+        parsed_data = db_query.get_parsed_resume(resume_id)
+
+        if not parsed_data:
+            raise HTTPException(status_code=404, detail="Resume data not found.")
+
+        matcher = MatchingAlgorithm()
+        filters = {
+            "location": location,
+            "job_type": job_type,
+            "salary_min": salary_min,
+            "salary_max": salary_max,
+            "exclude_expired": exclude_expired
+        }
+        top_matches = matcher.run(parsed_data, hybrid=hybrid, fuse=fuse, filters=filters)
+        recommend = Recommendation()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error running matching algorithm: {e}")
+
+    def events():
+        yield server_sent_event("matches", top_matches["top_matches"])
+        if top_matches["top_matches"] == "No strong matches found for this candidate.":
+            yield server_sent_event("done", {"content": None, "cached": False})
+            return
+        try:
+            for event, data in recommend.stream(top_matches):
+                yield server_sent_event(event, data)
+        except Exception as e:
+            yield server_sent_event("error", f"Error generating recommendations: {e}")
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def server_sent_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+# rank a stack of resumes against the jobs at once, no recommendations
+@app.post("/match_candidates")
+def match_candidates(resume_ids: List[int] = Body(..., embed=True),
+                     k: int = Query(10, ge=1, le=100),
+                     include_job_candidates: bool = Query(False)):
+    try:
+        matcher = MatchingAlgorithm()
+        result = matcher.run_batch(resume_ids, k=k, job_candidates=include_job_candidates)
+
+        if not result["top_matches"]:
+            raise HTTPException(status_code=404, detail="Resume data not found.")
+
+        return {
+            "message": "Matching algorithm ran successfully.",
+            **result
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error running matching algorithm: {e}")
+
+
+# opt a parsed resume into alerts for new jobs scoring above threshold
+@app.post("/alerts/{resume_id}")
+def subscribe_alerts(resume_id: int, threshold: float = Query(0.55, ge=0, le=1)):
+    try:
+        job_alerts = JobAlerts()
+        if not job_alerts.subscribe(resume_id, threshold):
+            raise HTTPException(status_code=404, detail="Resume data not found.")
+
+        return {
+            "message": "Subscribed to job alerts."
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error subscribing to job alerts: {e}")
+
+
+@app.delete("/alerts/{resume_id}")
+def unsubscribe_alerts(resume_id: int):
+    job_alerts = JobAlerts()
+    if not job_alerts.unsubscribe(resume_id):
+        raise HTTPException(status_code=404, detail="No alert subscription for this resume.")
+    return {
+        "message": "Unsubscribed from job alerts."
+    }
+
+
+# new jobs that matched a subscribed resume, reading them does not acknowledge them
+@app.get("/alerts/{resume_id}")
+def get_alerts(resume_id: int, unseen_only: bool = Query(False)):
+    job_alerts = JobAlerts()
+    alerts = job_alerts.get_alerts(resume_id, unseen_only)
+    if alerts is None:
+        raise HTTPException(status_code=500, detail="Failed to get job alerts.")
+    return {
+        "message": "Job alerts success",
+        "alerts": alerts
+    }
+
+
+# acknowledge alerts: the given job ids, or every unseen alert of the resume without a body
+@app.post("/alerts/{resume_id}/seen")
+def mark_alerts_seen(resume_id: int, job_ids: Optional[List[str]] = Body(None, embed=True)):
+    job_alerts = JobAlerts()
+    marked = job_alerts.mark_seen(resume_id, job_ids)
+    if marked is None:
+        raise HTTPException(status_code=500, detail="Failed to mark job alerts as seen.")
+    return {
+        "message": "Job alerts marked as seen.",
+        "marked": marked
+    }
+
+
+# hit/miss/eviction counters of this worker's embedding cache
+@app.get("/embedding_cache/stats")
+def embedding_cache_stats():
+    return {
+        "message": "Embedding cache stats",
+        "stats": EmbeddingCache.shared().stats()
+    }
+
+
+# hit/miss/eviction counters of this worker's recommendation cache
+@app.get("/recommendation_cache/stats")
+def recommendation_cache_stats():
+    return {
+        "message": "Recommendation cache stats",
+        "stats": RecommendationCache.shared().stats()
+    }
+
+
 # click on a job to more details of that job
 @app.get("/jobs/{id}")
 def view_job_details(id):
@@ -112,17 +348,26 @@ def scrape_jobs():
 # delete jobs button, for now would on jobs/{id} page,
 @app.delete("/delete_job/{job_id}")
 def delete_job(job_id):
+    # job_id is the Indeed id everywhere: database, elasticsearch, indexes and caches
     # delete from db
     db_query = QueryDatabase()
     from_db = db_query.delete_job(job_id)
+    if not from_db:
+        raise HTTPException(status_code=500, detail="Failed to delete job from database.")
+
+    # delete from the approximate index and the shared embedding file
+    JobEmbeddingStore().remove_jobs([job_id])
+    # and drop cached recommendations written about it
+    RecommendationCache.shared().invalidate_jobs([job_id])
+
     # delete from elasticsearch
     es = ElasticsearchService()
     from_es = es.delete_job(job_id)
 
     # if it successfully deletes from both
-    if from_es and from_db:
+    if from_es:
         return {
             "message": "Job successfully deleted"
         }
     else:
-        raise HTTPException(status_code=500, detail="Failed to delete job from database or Elasticsearch.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Job deleted from database but not from Elasticsearch.")
\ No newline at end of file
@@ -0,0 +1,242 @@
+import os
+import time
+import numpy as np
+from matching_algorithm.similarity_engine import SimilarityEngine
+
+# ------ APPROXIMATE NEAREST NEIGHBOUR INDEX (IVF) ------
+
+
+class IVFIndex:
+    """
+    Inverted file index over normalized job embeddings, CPU and NumPy only.
+    Jobs are grouped under the nearest of n_lists coarse centroids (spherical k-means)
+    and a query only scores the jobs in its n_probe closest groups.
+    n_probe is the recall/latency knob: more lists probed means better recall but slower search.
+    """
+    # Loaded indexes per (path, inode, modification time in ns), so each worker reads the file once
+    _loaded = dict()
+
+    def __init__(self, n_lists=None, n_probe=8, n_iter=10, seed=0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.seed = seed
+
+        self.centroids = None
+        self.list_ids = []
+        self.list_vectors = []
+        self.id_to_list = dict()
+
+    def __len__(self):
+        return len(self.id_to_list)
+
+    def build(self, job_ids, job_matrix):
+        """Train the coarse centroids on the job embeddings and assign every job to a list"""
+        vectors = SimilarityEngine.normalize(job_matrix)
+        if self.n_lists is None:
+            # Rule of thumb: about 4 * sqrt(n) lists
+            self.n_lists = max(1, int(4 * np.sqrt(len(vectors))))
+        self.n_lists = min(self.n_lists, len(vectors))
+
+        self.centroids = self.train_centroids(vectors)
+        self.list_ids = [np.empty(0, dtype=object) for _ in range(self.n_lists)]
+        self.list_vectors = [np.empty((0, vectors.shape[1]), dtype=np.float32) for _ in range(self.n_lists)]
+        self.id_to_list = dict()
+        self.add(job_ids, vectors)
+        return self
+
+    def train_centroids(self, vectors):
+        """Spherical k-means on a sample of the vectors"""
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(len(vectors), self.n_lists * 64)
+        sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+        centroids = sample[rng.choice(len(sample), self.n_lists, replace=False)].copy()
+
+        for _ in range(self.n_iter):
+            assignments = self.assign(sample, centroids)
+            counts = np.bincount(assignments, minlength=self.n_lists)
+
+            # Sum the members of every list in one pass over the sample sorted by list
+            sums = np.zeros_like(centroids)
+            order = np.argsort(assignments, kind="stable")
+            filled = np.flatnonzero(counts)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+            sums[filled] = np.add.reduceat(sample[order], starts, axis=0)
+
+            # Reseed empty lists with random points so no centroid is wasted
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = SimilarityEngine.normalize(sums)
+
+        return centroids
+
+    @staticmethod
+    def assign(vectors, centroids, chunk_size=8192):
+        """Position of the closest centroid for every vector, in chunks to bound memory"""
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            assignments[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+        return assignments
+
+    def add(self, job_ids, vectors):
+        """Add (or replace) jobs without retraining the centroids"""
+        if self.centroids is None:
+            raise Exception("Index is not built yet, call build() first.")
+
+        job_ids = np.asarray(job_ids, dtype=object)
+        vectors = SimilarityEngine.normalize(vectors)
+        if len(job_ids) == 0:
+            return
+
+        self.remove([job_id for job_id in job_ids if job_id in self.id_to_list])
+
+        assignments = self.assign(vectors, self.centroids)
+        for list_no in np.unique(assignments):
+            members = assignments == list_no
+            self.list_ids[list_no] = np.concatenate([self.list_ids[list_no], job_ids[members]])
+            self.list_vectors[list_no] = np.vstack([self.list_vectors[list_no], vectors[members]])
+
+        for job_id, list_no in zip(job_ids, assignments):
+            self.id_to_list[job_id] = int(list_no)
+
+    def remove(self, job_ids):
+        """Remove jobs from the index, unknown ids are ignored"""
+        by_list = dict()
+        for job_id in job_ids:
+            list_no = self.id_to_list.pop(job_id, None)
+            if list_no is not None:
+                by_list.setdefault(list_no, set()).add(job_id)
+
+        for list_no, removed in by_list.items():
+            keep = np.array([job_id not in removed for job_id in self.list_ids[list_no]], dtype=bool)
+            self.list_ids[list_no] = self.list_ids[list_no][keep]
+            self.list_vectors[list_no] = self.list_vectors[list_no][keep]
+
+    def search(self, query, k=10, n_probe=None):
+        """Return the ids and cosine scores of the (approximately) k closest jobs, best first"""
+        if self.centroids is None or len(self) == 0:
+            return np.empty(0, dtype=object), np.empty(0, dtype=np.float32)
+
+        query = SimilarityEngine.normalize(query)[0]
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+
+        ids = np.concatenate([self.list_ids[list_no] for list_no in probe])
+        if len(ids) == 0:
+            return ids, np.empty(0, dtype=np.float32)
+        scores = np.concatenate([self.list_vectors[list_no] @ query for list_no in probe])
+
+        if len(scores) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+            ids, scores = ids[best], scores[best]
+
+        order = np.argsort(-scores, kind="stable")
+        return ids[order], scores[order]
+
+    def top_k(self, resume_vec, job_titles, k=10, threshold=0.45, n_probe=None):
+        """Same output as SimilarityEngine.top_k, job_titles maps job id to title"""
+        ids, scores = self.search(resume_vec, k, n_probe)
+        return [{
+            "job_id": job_id,
+            "job_title": job_titles.get(job_id),
+            "score": round(float(score), 3)
+        } for job_id, score in zip(ids, scores) if score >= threshold]
+
+    def save(self, path):
+        """Save the index as a single .npz file, replacing any existing file atomically"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        sizes = np.array([len(ids) for ids in self.list_ids], dtype=np.int64)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as file:
+            np.savez(
+                file,
+                centroids=self.centroids,
+                sizes=sizes,
+                ids=np.concatenate(self.list_ids).astype(str),
+                vectors=np.vstack(self.list_vectors),
+                params=np.array([self.n_lists, self.n_probe, self.n_iter, self.seed], dtype=np.int64)
+            )
+        # Workers reloading the index never see a half-written zip
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load an index saved with save(), job ids come back as strings"""
+        with np.load(path) as data:
+            n_lists, n_probe, n_iter, seed = (int(value) for value in data["params"])
+            index = cls(n_lists, n_probe, n_iter, seed)
+            index.centroids = data["centroids"]
+
+            offsets = np.concatenate([[0], np.cumsum(data["sizes"])])
+            ids = data["ids"].astype(object)
+            vectors = data["vectors"]
+
+        for list_no in range(n_lists):
+            start, end = offsets[list_no], offsets[list_no + 1]
+            index.list_ids.append(ids[start:end])
+            index.list_vectors.append(np.ascontiguousarray(vectors[start:end]))
+            for job_id in ids[start:end]:
+                index.id_to_list[job_id] = list_no
+        return index
+
+
+    @classmethod
+    def load_cached(cls, path):
+        """Load the index once per process, reloading only when the file changes"""
+        stat = os.stat(path)
+        key = (path, stat.st_ino, stat.st_mtime_ns)
+        if key not in cls._loaded:
+            cls._loaded.clear()
+            cls._loaded[key] = cls.load(path)
+        return cls._loaded[key]
+
+
+def recall_at_k(index, job_ids, job_matrix, queries, k=10, n_probe_values=(1, 2, 4, 8, 16, 32)):
+    """
+    Compare the index against the exact scorer on the same queries.
+    Returns one row per n_probe with the mean recall@k and the mean search latency in milliseconds
+    """
+    exact = SimilarityEngine(job_ids, job_ids, job_matrix)
+    truth = [set(match["job_id"] for match in exact.top_k(query, k, threshold=-1.0)) for query in queries]
+
+    report = []
+    for n_probe in n_probe_values:
+        recalls, latencies = [], []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            ids, _ = index.search(query, k, n_probe)
+            latencies.append((time.perf_counter() - start) * 1000)
+            recalls.append(len(expected.intersection(ids)) / max(len(expected), 1))
+
+        report.append({
+            "n_probe": n_probe,
+            "recall_at_k": round(float(np.mean(recalls)), 4),
+            "latency_ms": round(float(np.mean(latencies)), 3)
+        })
+    return report
+
+
+if __name__ == '__main__':
+    # Build the index from the stored job embeddings, check recall@10 against exact scoring and save it
+    from shared.config import Config
+    from matching_algorithm.embedding_store import JobEmbeddingStore
+
+    store = JobEmbeddingStore()
+    jobs_df, job_matrix = store.load_matrix()
+    job_ids = jobs_df['job_id'].to_numpy(dtype=object)
+
+    ivf = IVFIndex(n_probe=Config.ANN_N_PROBE).build(job_ids, job_matrix)
+
+    # Use perturbed job vectors as stand-in resume queries
+    rng = np.random.default_rng(0)
+    sample = job_matrix[rng.choice(len(job_matrix), min(200, len(job_matrix)), replace=False)]
+    noisy_queries = sample + rng.normal(0, 0.02, sample.shape).astype(np.float32)
+
+    for row in recall_at_k(ivf, job_ids, job_matrix, noisy_queries):
+        print(row)
+
+    ivf.save(Config.ANN_INDEX_PATH)
+    print(f"Saved index with {len(ivf)} jobs in {ivf.n_lists} lists to {Config.ANN_INDEX_PATH}")
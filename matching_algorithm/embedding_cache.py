@@ -0,0 +1,118 @@
+import hashlib
+import re
+import unicodedata
+import numpy as np
+from shared.config import Config
+from matching_algorithm.sqlite_cache import SqliteLRUCache
+
+# ------ CONTENT-ADDRESSED EMBEDDING CACHE ------
+
+
+class EmbeddingCache(SqliteLRUCache):
+    """
+    Embeddings keyed by (model, hash of the normalized text).
+    A bounded in-process LRU sits in front of a SQLite file shared by every worker,
+    so identical texts (re-uploaded resumes, reposted jobs) are only embedded once.
+    Both tiers hold float32 vectors, callers that need lists convert at their boundary.
+    """
+    def __init__(self, model=Config.EMBEDDING_MODEL, max_items=Config.EMBEDDING_CACHE_SIZE,
+                 path=Config.EMBEDDING_CACHE_PATH):
+        self.model = model
+        super().__init__(max_items, path)
+
+    def create_tables(self, conn):
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+
+    @classmethod
+    def shared(cls, model=Config.EMBEDDING_MODEL):
+        """Process-wide cache of one embedding model"""
+        return super().shared(model)
+
+    @staticmethod
+    def normalize(text):
+        """Unicode and whitespace normalization so trivially different copies share a key"""
+        text = unicodedata.normalize("NFKC", str(text))
+        return re.sub(r"\s+", " ", text).strip()
+
+    def key(self, text):
+        return hashlib.sha256(self.normalize(text).encode("utf-8")).hexdigest()
+
+    def get_many(self, texts):
+        """Cached embeddings for texts as {position: read-only float32 array}, missing texts are left out"""
+        keys = [self.key(text) for text in texts]
+        found = dict()
+        disk_lookups = dict()
+
+        with self.lock:
+            for i, key in enumerate(keys):
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    found[i] = self.memory[key]
+                    self.counters["memory_hits"] += 1
+                else:
+                    disk_lookups.setdefault(key, []).append(i)
+
+        if disk_lookups and self.path:
+            for key, embedding in self.read_disk(list(disk_lookups)).items():
+                positions = disk_lookups.pop(key)
+                for i in positions:
+                    found[i] = embedding
+                with self.lock:
+                    self.counters["disk_hits"] += len(positions)
+                    self.remember_vector(key, embedding)
+
+        with self.lock:
+            self.counters["misses"] += sum(len(positions) for positions in disk_lookups.values())
+        return found
+
+    def put_many(self, texts, embeddings):
+        """Store embeddings in both tiers"""
+        rows = []
+        with self.lock:
+            for text, embedding in zip(texts, embeddings):
+                key = self.key(text)
+                vector = np.array(embedding, dtype=np.float32)
+                self.remember_vector(key, vector)
+                rows.append((self.model, key, vector.tobytes()))
+
+        if rows and self.path:
+            with self.connect() as conn:
+                conn.executemany("INSERT OR REPLACE INTO embeddings (model, text_hash, embedding) VALUES (?, ?, ?);",
+                                 rows)
+
+    def get(self, text):
+        return self.get_many([text]).get(0)
+
+    def put(self, text, embedding):
+        self.put_many([text], [embedding])
+
+    def remember_vector(self, key, embedding):
+        """Keep a float32 vector in the memory tier (lock held)"""
+        # Shared between callers, so nobody may change it in place
+        embedding.flags.writeable = False
+        self.remember(key, embedding)
+
+    def read_disk(self, keys, chunk_size=500):
+        """Look keys up in the SQLite tier"""
+        found = dict()
+        with self.connect() as conn:
+            for start in range(0, len(keys), chunk_size):
+                chunk = keys[start:start + chunk_size]
+                placeholders = ", ".join("?" for _ in chunk)
+                rows = conn.execute(
+                    f"SELECT text_hash, embedding FROM embeddings WHERE model = ? AND text_hash IN ({placeholders});",
+                    [self.model, *chunk]
+                )
+                for key, blob in rows:
+                    # frombuffer arrays are read-only views of the blob, no copy
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
@@ -0,0 +1,125 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from openai import OpenAI
+from shared.config import Config
+from matching_algorithm.embedding_cache import EmbeddingCache
+from matching_algorithm.embedding_providers import EmbeddingProvider
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# ------ BATCHED OPENAI EMBEDDINGS ------
+
+
+class BatchEmbeddingClient(EmbeddingProvider):
+    """
+    OpenAI embedding backend: embed many texts with as few requests as possible.
+    Texts are packed into batches under an item count and a token limit,
+    a bounded number of batches run at once and each batch is retried on its own.
+    """
+    def __init__(self, model=Config.EMBEDDING_MODEL, max_items=Config.EMBEDDING_BATCH_SIZE,
+                 max_tokens=Config.EMBEDDING_BATCH_TOKENS, max_workers=Config.EMBEDDING_CONCURRENCY,
+                 max_retries=3, retry_delay=1.0, cache=None, client=None):
+        try:
+            # client lets benchmarks swap in a local fake with the same embeddings.create API
+            self.client = client or OpenAI(api_key=Config.get_api_key())
+        except Exception as e:
+            raise Exception(f"Error initializing OpenAI: {e}")
+
+        self.model = model
+        self.max_items = max_items
+        self.max_tokens = max_tokens
+        self.max_input_tokens = Config.EMBEDDING_MAX_INPUT_TOKENS
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.cache = cache if cache is not None else EmbeddingCache.shared(model)
+
+        # Use the real tokenizer when it is installed, otherwise a conservative estimate
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("cl100k_base")
+
+    def embed(self, texts):
+        """Embed a list of texts, returns one vector per text in input order"""
+        texts = [self.truncate(str(text)) for text in texts]
+        embeddings = [None] * len(texts)
+        # The cache keeps float32 arrays, callers get lists like the API returns
+        for i, vector in self.cache.get_many(texts).items():
+            embeddings[i] = vector.tolist()
+
+        # Only send each distinct uncached text once
+        positions = dict()
+        for i, text in enumerate(texts):
+            if embeddings[i] is None:
+                positions.setdefault(self.cache.key(text), []).append(i)
+        unique_texts = [texts[same[0]] for same in positions.values()]
+
+        batches = self.make_batches(unique_texts)
+        if not batches:
+            return embeddings
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(lambda batch: self.embed_batch([unique_texts[i] for i in batch]), batches)
+            for batch, vectors in zip(batches, results):
+                self.cache.put_many([unique_texts[i] for i in batch], vectors)
+                for i, vector in zip(batch, vectors):
+                    for position in positions[self.cache.key(unique_texts[i])]:
+                        embeddings[position] = vector
+
+        print(f"Embedded {len(unique_texts)} of {len(texts)} texts in {len(batches)} requests.")
+        return embeddings
+
+    def make_batches(self, texts):
+        """Pack text positions into batches that respect the item and token limits"""
+        batches = []
+        current, current_tokens = [], 0
+        for i, text in enumerate(texts):
+            tokens = self.count_tokens(text)
+            if current and (len(current) >= self.max_items or current_tokens + tokens > self.max_tokens):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += tokens
+
+        if current:
+            batches.append(current)
+        return batches
+
+    def embed_batch(self, batch_texts):
+        """Send one batch, retrying it with exponential backoff if it fails"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.client.embeddings.create(
+                    input = batch_texts,
+                    model = self.model
+                )
+                # The API tags every vector with the position of its input
+                data = sorted(response.data, key=lambda item: item.index)
+                return [item.embedding for item in data]
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise Exception(f"Error generating embeddings for batch of {len(batch_texts)}: {e}")
+                print(f"Embedding batch failed ({e}), retrying...")
+                time.sleep(self.retry_delay * 2 ** attempt)
+
+    def count_tokens(self, text):
+        """Number of tokens in text"""
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        # roughly 4 characters per token for english, 3 keeps the estimate on the safe side
+        return len(text) // 3 + 1
+
+    def truncate(self, text):
+        """Cut texts that are longer than the model accepts for a single input"""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text)
+            if len(tokens) > self.max_input_tokens:
+                return self.encoding.decode(tokens[:self.max_input_tokens])
+            return text
+        return text[:self.max_input_tokens * 3]
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import time
+import joblib
+import numpy as np
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+from sklearn.decomposition import TruncatedSVD
+from shared.config import Config
+
+# ------ EMBEDDING PROVIDERS ------
+
+
+class EmbeddingProvider:
+    """
+    Interface every embedding backend implements.
+    model is the name stored with the embeddings, so vectors from different backends never mix
+    """
+    model = None
+
+    def embed(self, texts):
+        """One vector per text, in input order"""
+        raise NotImplementedError
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    CPU-only embeddings, no network: hashing vectorizer -> TF-IDF -> truncated SVD,
+    fitted on the jobs corpus and persisted with joblib
+    """
+    def __init__(self, vectorizer, tfidf, svd, fit_id):
+        self.vectorizer = vectorizer
+        self.tfidf = tfidf
+        self.svd = svd
+        self.fit_id = fit_id
+        # A refit gives a different vector space, so it gets a new model name
+        self.model = f"local-tfidf-svd-{svd.n_components}-{fit_id}"
+
+        # float32 idf weights and (features x dims) projection for the fast path in embed()
+        self.idf = tfidf.idf_.astype(np.float32)
+        self.projection = np.ascontiguousarray(svd.components_.T, dtype=np.float32)
+
+    @classmethod
+    def fit(cls, texts, n_features=Config.LOCAL_EMBEDDING_FEATURES, dims=Config.LOCAL_EMBEDDING_DIMS):
+        """Fit the pipeline on a corpus of texts"""
+        vectorizer = HashingVectorizer(n_features=n_features, ngram_range=(1, 2),
+                                       alternate_sign=False, norm=None)
+        counts = vectorizer.transform(texts)
+        tfidf = TfidfTransformer(sublinear_tf=True)
+        weighted = tfidf.fit_transform(counts)
+
+        # SVD needs fewer components than documents
+        dims = max(1, min(dims, weighted.shape[0] - 1))
+        svd = TruncatedSVD(n_components=dims, random_state=0)
+        svd.fit(weighted)
+
+        fit_id = hashlib.sha256(f"{len(texts)}-{time.time()}".encode("utf-8")).hexdigest()[:8]
+        return cls(vectorizer, tfidf, svd, fit_id)
+
+    def embed(self, texts):
+        """
+        Same result as tfidf.transform + svd.transform up to the row length, which cosine similarity ignores.
+        Done by hand in float32 because the sklearn path converts the projection to float64 on every call
+        """
+        counts = self.vectorizer.transform([str(text) for text in texts]).tocsr().astype(np.float32)
+        # sublinear tf times idf, as fitted
+        counts.data = (1 + np.log(counts.data)) * self.idf[counts.indices]
+        return np.asarray(counts @ self.projection).tolist()
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        joblib.dump({"vectorizer": self.vectorizer, "tfidf": self.tfidf, "svd": self.svd, "fit_id": self.fit_id}, path)
+
+    @classmethod
+    def load(cls, path):
+        data = joblib.load(path)
+        return cls(data["vectorizer"], data["tfidf"], data["svd"], data["fit_id"])
+
+
+# One provider per process, loaded at startup or on first use
+_provider = None
+
+
+def get_embedding_provider():
+    """The embedding backend selected by Config.EMBEDDING_BACKEND ("openai" or "local")"""
+    global _provider
+    if _provider is None:
+        if Config.EMBEDDING_BACKEND == "local":
+            if not os.path.exists(Config.LOCAL_EMBEDDING_PATH):
+                raise Exception(f"Local embedding model not found at {Config.LOCAL_EMBEDDING_PATH}. "
+                                "Fit it with: python -m matching_algorithm.embedding_providers")
+            _provider = LocalEmbeddingProvider.load(Config.LOCAL_EMBEDDING_PATH)
+        elif Config.EMBEDDING_BACKEND == "openai":
+            # Imported here so the local backend never needs the OpenAI package or an API key
+            from matching_algorithm.embedding_client import BatchEmbeddingClient
+            _provider = BatchEmbeddingClient(Config.EMBEDDING_MODEL)
+        else:
+            raise ValueError(f"Unknown embedding backend: {Config.EMBEDDING_BACKEND}")
+    return _provider
+
+
+if __name__ == '__main__':
+    # Fit the local model on the jobs in the database, then embed every job with it
+    from data_pipeline.data_preprocessing import DataPreprocessing
+    from matching_algorithm.embedding_store import JobEmbeddingStore
+
+    # Only the job texts are kept, the table is streamed in chunks
+    job_texts = []
+    for jobs_df in DataPreprocessing.iter_preprocessed_data(['title', 'description'], 'jobs', ['title', 'description']):
+        job_texts.extend(JobEmbeddingStore.job_text(title, description)
+                         for title, description in zip(jobs_df['title'], jobs_df['description']))
+
+    local_provider = LocalEmbeddingProvider.fit(job_texts)
+    local_provider.save(Config.LOCAL_EMBEDDING_PATH)
+    print(f"Fitted {local_provider.model} on {len(job_texts)} jobs, saved to {Config.LOCAL_EMBEDDING_PATH}")
+
+    store = JobEmbeddingStore(local_provider)
+    store.backfill()
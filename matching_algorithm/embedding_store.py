@@ -0,0 +1,210 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+import psycopg2
+from shared.config import Config
+from backend.db.config import load_config
+from backend.db.insert import insert_job_embeddings
+from backend.db.utils import QueryDatabase
+from matching_algorithm.embedding_providers import get_embedding_provider
+from matching_algorithm.ann_index import IVFIndex
+from matching_algorithm.embedding_file import EmbeddingFile
+from matching_algorithm.similarity_engine import SimilarityEngine
+from matching_algorithm.recommendation_cache import RecommendationCache
+from data_pipeline.data_preprocessing import DataPreprocessing
+
+# ------ PERSISTENT JOB EMBEDDINGS ------
+
+JOB_COLUMNS = ["id", "job_id", "title", "description"]
+
+# pg_advisory_lock key held while the approximate index file is loaded, changed and saved
+ANN_INDEX_LOCK_KEY = 720418
+
+
+@contextmanager
+def ann_index_lock():
+    """
+    Serialize index updates across threads and processes, so a scrape and a delete
+    running at the same time do not overwrite each other's changes
+    """
+    conn = psycopg2.connect(**load_config())
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s);", (ANN_INDEX_LOCK_KEY,))
+        try:
+            yield
+        finally:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s);", (ANN_INDEX_LOCK_KEY,))
+    finally:
+        conn.close()
+
+
+class JobEmbeddingStore:
+    """Compute job embeddings once at ingestion and load them as one matrix at match time"""
+    # Exact-mode engines kept per process: model -> (embeddings version, SimilarityEngine)
+    _engines = {}
+    _engines_lock = threading.Lock()
+
+    def __init__(self, embedding_provider=None):
+        self.embedding_client = embedding_provider or get_embedding_provider()
+        self.model = self.embedding_client.model
+
+        self.db_query = QueryDatabase()
+        self.data_preprocessor = DataPreprocessing()
+
+    def embed_jobs(self, jobs):
+        """
+        Embed new jobs (list of dicts with id, job_id, title, description) and store the vectors next to them.
+        Returns the stored rows (id, model, content_hash, embedding)
+        """
+        if not jobs:
+            return []
+
+        jobs_df = pd.DataFrame(jobs, columns=JOB_COLUMNS)
+        jobs_df = self.data_preprocessor.preprocess_data(jobs_df, ['title', 'description'])
+
+        job_texts = [self.job_text(title, description)
+                     for title, description in zip(jobs_df['title'], jobs_df['description'])]
+        embeddings = self.embedding_client.embed(job_texts)
+
+        job_embeddings = []
+        for job_id, job_text, embedding in zip(jobs_df['id'], job_texts, embeddings):
+            job_embeddings.append({
+                "id": job_id,
+                "model": self.model,
+                "content_hash": self.content_hash(job_text),
+                "embedding": embedding
+            })
+
+        insert_job_embeddings(job_embeddings)
+        self.invalidate_engines()
+        self.update_ann_index(jobs_df['job_id'], embeddings)
+        self.refresh_embedding_file()
+        return job_embeddings
+
+    def remove_jobs(self, job_ids):
+        """Keep the cached engines, the approximate index and the shared embedding file in sync after jobs are deleted"""
+        self.invalidate_engines()
+        self.remove_from_ann_index(job_ids)
+        self.refresh_embedding_file()
+
+    def load_engine(self):
+        """
+        SimilarityEngine over every embedded job, built once per process and reused until the stored
+        embeddings change (checked with one COUNT/MAX query, so other workers' ingests are seen too)
+        """
+        version = self.db_query.get_job_embeddings_version(self.model)
+        with JobEmbeddingStore._engines_lock:
+            cached = JobEmbeddingStore._engines.get(self.model)
+            # If the version query failed, keep serving the engine we have
+            if cached is not None and (version is None or cached[0] == version):
+                return cached[1]
+
+            jobs_df, job_matrix = self.load_matrix()
+            engine = SimilarityEngine(jobs_df['job_id'], jobs_df['title'], job_matrix)
+            JobEmbeddingStore._engines[self.model] = (version, engine)
+            return engine
+
+    @classmethod
+    def invalidate_engines(cls):
+        """Drop this process's cached engines, the next match rebuilds them"""
+        with cls._engines_lock:
+            cls._engines.clear()
+
+    def refresh_embedding_file(self):
+        """Rewrite the shared memory-mapped embedding file from the database, if one is in use"""
+        if not os.path.exists(Config.EMBEDDING_FILE_PATH):
+            return
+        jobs_df, job_matrix = self.load_matrix()
+        EmbeddingFile.write(Config.EMBEDDING_FILE_PATH, jobs_df['job_id'], jobs_df['title'],
+                            job_matrix, Config.EMBEDDING_FILE_DTYPE)
+
+    def update_ann_index(self, job_ids, embeddings):
+        """Add new job vectors to the approximate index, if one has been built"""
+        if not os.path.exists(Config.ANN_INDEX_PATH):
+            return
+        with ann_index_lock():
+            ann_index = IVFIndex.load(Config.ANN_INDEX_PATH)
+            ann_index.add(job_ids, embeddings)
+            ann_index.save(Config.ANN_INDEX_PATH)
+
+    @staticmethod
+    def remove_from_ann_index(job_ids):
+        """Remove deleted jobs from the approximate index, if one has been built"""
+        if not os.path.exists(Config.ANN_INDEX_PATH):
+            return
+        with ann_index_lock():
+            ann_index = IVFIndex.load(Config.ANN_INDEX_PATH)
+            ann_index.remove(job_ids)
+            ann_index.save(Config.ANN_INDEX_PATH)
+
+    def backfill(self):
+        """Embed jobs that have no embedding for this model yet, or whose text changed since"""
+        # The jobs table is streamed in chunks, only the stale jobs are kept
+        stale_chunks = []
+        for jobs_df in self.data_preprocessor.iter_data_from_db(JOB_COLUMNS, "jobs"):
+            stored_hashes = self.db_query.get_job_embedding_hashes(self.model, jobs_df["id"].tolist())
+
+            cleaned_df = self.data_preprocessor.preprocess_data(jobs_df.copy(), ['title', 'description'])
+            current_hashes = [self.content_hash(self.job_text(title, description))
+                              for title, description in zip(cleaned_df['title'], cleaned_df['description'])]
+
+            stale_mask = [stored_hashes.get(job_id) != current
+                          for job_id, current in zip(jobs_df["id"], current_hashes)]
+            stale_chunks.append(jobs_df[stale_mask])
+
+        stale = pd.concat(stale_chunks, ignore_index=True) if stale_chunks else pd.DataFrame(columns=JOB_COLUMNS)
+        print(f"Backfilling {len(stale)} job embeddings for model {self.model}")
+        # Edited jobs: recommendations written from their old text are out of date
+        RecommendationCache.shared().invalidate_jobs(stale["job_id"].tolist())
+        return self.embed_jobs(stale[JOB_COLUMNS].to_dict(orient="records"))
+
+    def load_matrix(self):
+        """
+        Load every embedded job, streamed in chunks that are converted as they arrive.
+        Returns the preprocessed jobs dataframe and a float32 matrix with one row per job
+        """
+        jobs_chunks = []
+        matrix_chunks = []
+        for rows in self.db_query.iter_job_embeddings(self.model):
+            jobs_df = pd.DataFrame([row[:4] for row in rows], columns=JOB_COLUMNS)
+            jobs_chunks.append(self.data_preprocessor.preprocess_data(jobs_df, ['title', 'description']))
+            matrix_chunks.append(np.array([row[4] for row in rows], dtype=np.float32))
+
+        if not jobs_chunks:
+            jobs_df = pd.DataFrame(columns=JOB_COLUMNS)
+            return self.data_preprocessor.preprocess_data(jobs_df, ['title', 'description']), \
+                np.empty((0, 0), dtype=np.float32)
+
+        return pd.concat(jobs_chunks, ignore_index=True), np.concatenate(matrix_chunks)
+
+    def load_jobs_by_ids(self, job_ids):
+        """Load only the given jobs (by job_id) and their embeddings, for re-ranking a candidate set"""
+        rows = self.db_query.get_job_embeddings_by_job_ids(job_ids, self.model)
+        jobs_df = pd.DataFrame([row[:4] for row in rows], columns=JOB_COLUMNS)
+        jobs_df = self.data_preprocessor.preprocess_data(jobs_df, ['title', 'description'])
+
+        if not rows:
+            return jobs_df, np.empty((0, 0), dtype=np.float32)
+
+        job_matrix = np.array([row[4] for row in rows], dtype=np.float32)
+        return jobs_df, job_matrix
+
+    @staticmethod
+    def job_text(title, description):
+        """Text that gets embedded for a job, title and description are already preprocessed"""
+        return f"{title} {description}"
+
+    @staticmethod
+    def content_hash(text):
+        """Hash of the embedded text, used to tell when a stored embedding is stale"""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+if __name__ == '__main__':
+    store = JobEmbeddingStore()
+    store.backfill()
@@ -0,0 +1,75 @@
+import numpy as np
+from shared.config import Config
+from backend.db.utils import QueryDatabase
+from backend.db.insert import insert_alert_subscription, insert_job_alerts
+from matching_algorithm.similarity_engine import SimilarityEngine
+from matching_algorithm.matching_system import MatchingAlgorithm
+from matching_algorithm.embedding_providers import get_embedding_provider
+
+# ------ SAVED-RESUME JOB ALERTS ------
+
+
+class JobAlerts:
+    """
+    Resumes can opt into alerts. Every scrape run scores only the newly inserted jobs
+    against the stored vectors of subscribed resumes, so the cost grows with new jobs, not the catalog
+    """
+    def __init__(self, model=None):
+        self.model = model or get_embedding_provider().model
+        self.db_query = QueryDatabase()
+
+    def subscribe(self, resume_id, threshold=Config.ALERT_THRESHOLD):
+        """Opt a resume into alerts, embedding it now so scrape runs never have to"""
+        parsed_resumes = self.db_query.get_parsed_resumes([resume_id])
+        if resume_id not in parsed_resumes:
+            return False
+
+        matcher = MatchingAlgorithm()
+        resume_text = matcher.extract_resume_text(parsed_resumes[resume_id])
+        matcher.get_resume_embeddings([resume_id], [resume_text])
+
+        return insert_alert_subscription(resume_id, threshold)
+
+    def unsubscribe(self, resume_id):
+        return self.db_query.delete_alert_subscription(resume_id)
+
+    def score_new_jobs(self, job_embeddings):
+        """
+        Score new jobs (rows returned by JobEmbeddingStore.embed_jobs) against every subscribed resume
+        and store the hits above each resume's threshold as alerts
+        """
+        if not job_embeddings:
+            return []
+
+        subscriptions = self.db_query.get_subscribed_resume_embeddings(self.model)
+        if not subscriptions:
+            return []
+
+        resume_ids = [row[0] for row in subscriptions]
+        thresholds = np.array([row[1] for row in subscriptions], dtype=np.float32)
+        resume_matrix = np.array([row[2] for row in subscriptions], dtype=np.float32)
+
+        job_ids = [job["id"] for job in job_embeddings]
+        new_jobs = SimilarityEngine(job_ids, job_ids, [job["embedding"] for job in job_embeddings])
+
+        # new jobs x subscribed resumes, each column compared to its own threshold
+        scores = new_jobs.scores_many(resume_matrix)
+        rows, columns = np.nonzero(scores >= thresholds)
+
+        job_alerts = [{
+            "resume_id": resume_ids[column],
+            "job_id": job_ids[row],
+            "score": round(float(scores[row, column]), 3)
+        } for row, column in zip(rows, columns)]
+
+        if job_alerts:
+            insert_job_alerts(job_alerts)
+        print(f"{len(job_alerts)} alerts from {len(job_ids)} new jobs and {len(resume_ids)} subscribed resumes.")
+        return job_alerts
+
+    def get_alerts(self, resume_id, unseen_only=False):
+        return self.db_query.get_job_alerts(resume_id, unseen_only)
+
+    def mark_seen(self, resume_id, job_ids=None):
+        """Acknowledge alerts, all of the resume's unless job_ids is given"""
+        return self.db_query.mark_job_alerts_seen(resume_id, job_ids)
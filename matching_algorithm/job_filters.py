@@ -0,0 +1,106 @@
+import re
+import time
+import threading
+import numpy as np
+from shared.config import Config
+from backend.db.utils import QueryDatabase
+
+# ------ STRUCTURED JOB PRE-FILTERS ------
+
+
+class JobFilterIndex:
+    """
+    In-memory indexes over the structured job fields, so matching only scores the jobs that pass the filters.
+    Location tokens and job types map to sorted arrays of job positions, expiry is a boolean bitmap
+    and salaries are two float arrays (NaN when unknown)
+    """
+    # One index per process, rebuilt from the database every FILTER_INDEX_TTL seconds
+    _cached = None
+    _cached_at = 0.0
+    _cache_lock = threading.Lock()
+
+    def __init__(self, jobs, job_types=(), salaries=()):
+        self.job_ids = np.array([job_id for job_id, _, _ in jobs], dtype=object)
+        position = {job_id: i for i, job_id in enumerate(self.job_ids)}
+
+        self.expired = np.array([bool(is_expired) for _, _, is_expired in jobs], dtype=bool)
+
+        by_location = dict()
+        for i, (_, location, _) in enumerate(jobs):
+            for token in set(self.tokenize(location)):
+                by_location.setdefault(token, []).append(i)
+        self.by_location = {token: np.array(positions, dtype=np.int64) for token, positions in by_location.items()}
+
+        by_job_type = dict()
+        for job_id, job_type in job_types:
+            if job_id in position:
+                by_job_type.setdefault(self.normalize_job_type(job_type), []).append(position[job_id])
+        self.by_job_type = {job_type: np.unique(positions) for job_type, positions in by_job_type.items()}
+
+        self.salary_min = np.full(len(self.job_ids), np.nan)
+        self.salary_max = np.full(len(self.job_ids), np.nan)
+        for job_id, min_salary, max_salary in salaries:
+            if job_id in position:
+                # A single figure is both ends of the range
+                min_salary = min_salary if min_salary is not None else max_salary
+                max_salary = max_salary if max_salary is not None else min_salary
+                self.salary_min[position[job_id]] = min_salary if min_salary is not None else np.nan
+                self.salary_max[position[job_id]] = max_salary if max_salary is not None else np.nan
+
+    @classmethod
+    def load(cls):
+        """Build the index from the jobs, job_job_types and salary_range tables"""
+        filter_data = QueryDatabase().get_job_filter_data()
+        return cls(filter_data["jobs"], filter_data["job_types"], filter_data["salaries"])
+
+    @classmethod
+    def load_cached(cls):
+        """Process-wide index, refreshed once it is older than Config.FILTER_INDEX_TTL"""
+        with cls._cache_lock:
+            if cls._cached is None or time.time() - cls._cached_at > Config.FILTER_INDEX_TTL:
+                cls._cached = cls.load()
+                cls._cached_at = time.time()
+            return cls._cached
+
+    @staticmethod
+    def tokenize(location):
+        return re.findall(r"[a-z0-9]+", str(location or "").lower())
+
+    @staticmethod
+    def normalize_job_type(job_type):
+        # Same normalization as insert_jobs
+        return str(job_type).strip().capitalize()
+
+    def match(self, location=None, job_type=None, salary_min=None, salary_max=None, exclude_expired=False):
+        """
+        Job ids passing every given filter. Position sets are intersected smallest first,
+        so a narrow filter keeps the rest of the work small
+        """
+        candidates = []
+        if location:
+            for token in set(self.tokenize(location)):
+                candidates.append(self.by_location.get(token, np.empty(0, dtype=np.int64)))
+        if job_type:
+            candidates.append(self.by_job_type.get(self.normalize_job_type(job_type), np.empty(0, dtype=np.int64)))
+
+        if candidates:
+            candidates.sort(key=len)
+            positions = candidates[0]
+            for other in candidates[1:]:
+                positions = np.intersect1d(positions, other, assume_unique=True)
+        else:
+            positions = np.arange(len(self.job_ids))
+
+        # Salary band: the job's range has to overlap the requested one, jobs without a salary are left out
+        if salary_min is not None:
+            positions = positions[self.salary_max[positions] >= salary_min]
+        if salary_max is not None:
+            positions = positions[self.salary_min[positions] <= salary_max]
+        if exclude_expired:
+            positions = positions[~self.expired[positions]]
+
+        return self.job_ids[positions]
+
+
+def has_filters(filters):
+    return bool(filters) and any(value not in (None, "", False) for value in filters.values())
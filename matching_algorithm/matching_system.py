@@ -1,39 +1,47 @@
-from openai import OpenAI
+import numpy as np
+import pandas as pd
 from shared.config import Config # i'm thinking of having one config file later for all shared configurations
-from sklearn.metrics.pairwise import cosine_similarity
 from data_pipeline.data_preprocessing import DataPreprocessing
+from data_pipeline.elasticsearch_service import ElasticsearchService
+from backend.db.utils import QueryDatabase
+from backend.db.insert import insert_resume_embeddings
+from matching_algorithm.embedding_store import JobEmbeddingStore
+from matching_algorithm.embedding_providers import get_embedding_provider
+from matching_algorithm.similarity_engine import SimilarityEngine
+from matching_algorithm.ann_index import IVFIndex
+from matching_algorithm.embedding_file import EmbeddingFile, MappedSimilarityEngine
+from matching_algorithm.job_filters import JobFilterIndex, has_filters
 
 
 class MatchingAlgorithm:
     def __init__(self):
         try:
-            self.client = OpenAI(api_key=Config.get_api_key())
-            self.model = "text-embedding-3-small"
+            self.data_preprocessor = DataPreprocessing()
         except Exception as e:
-            raise Exception(f"Error initializing OpenAI: {e}")
+            raise Exception(f"Error initializing DataPreprocessing class: {e}")
+
+        self.db_query = QueryDatabase()
 
         try:
-            self.data_preprocessor = DataPreprocessing()
+            # OpenAI or the local backend, depending on Config.EMBEDDING_BACKEND
+            self.embedding_client = get_embedding_provider()
+            self.model = self.embedding_client.model
+            self.embedding_store = JobEmbeddingStore(self.embedding_client)
         except Exception as e:
-            raise Exception(f"Error initializing DataPreprocessing class: {e}")
+            raise Exception(f"Error initializing embedding backend: {e}")
 
-    def run(self, resume_data):
+    def run(self, resume_data, k=Config.MATCH_TOP_K, threshold=Config.MATCH_THRESHOLD, hybrid=False, fuse=False,
+            filters=None):
         """
         Get the similarity scores between resume and jobs in the database.
-        Return the top 10 jobs that matches with the resume
+        Return the top k jobs (10 by default) that matches with the resume.
+        hybrid only re-ranks the Elasticsearch BM25 candidates, fuse also merges both rankings (RRF).
+        filters (location, job_type, salary_min, salary_max, exclude_expired) limit which jobs get scored
         """
-        # Get jobs from database
-        jobs_df = self.data_preprocessor.get_data_from_db(['job_id', 'title', 'description'], 'jobs')
-
-        # preprocess the job data
-        jobs_df = self.data_preprocessor.preprocess_data(jobs_df, ['title', 'description'])
-
-        # Generate job embeddings for the jobs
-        job_embeddings = []
-        for _, row in jobs_df.iterrows():
-            job_text = f"{row['title']} {row['description']}"
-            job_embedding = self.generate_embedding(job_text)["embedding"]
-            job_embeddings.append((row['job_id'], row['title'], job_embedding))
+        # Jobs passing the structured filters, None means every job
+        allowed_ids = None
+        if has_filters(filters):
+            allowed_ids = JobFilterIndex.load_cached().match(**filters)
 
         # Parse the resume
         #resume_data = self.parser.run()
@@ -45,18 +53,28 @@ class MatchingAlgorithm:
         resume_embedding = self.generate_embedding(resume_text)["embedding"]
 
         # Now find the top matches
-        top_matches = self.compare_similarity(resume_embedding, job_embeddings)
+        if hybrid:
+            jobs_df, top_matches = self.hybrid_search(resume_data, resume_embedding, k, threshold, fuse, allowed_ids)
+        else:
+            jobs_df = None
+            job_embeddings = self.load_jobs()
+            if isinstance(job_embeddings, IVFIndex):
+                # Titles are filled in with the details of the returned jobs
+                if allowed_ids is None:
+                    top_matches = job_embeddings.top_k(resume_embedding, {}, k, threshold)
+                else:
+                    # The index can not skip lists by filter, so over-fetch and filter its results
+                    allowed = set(allowed_ids)
+                    top_matches = [match for match in job_embeddings.top_k(
+                        resume_embedding, {}, k * Config.FILTER_OVERFETCH, threshold)
+                                   if match["job_id"] in allowed][:k]
+                top_matches = top_matches or "No strong matches found for this candidate."
+            else:
+                top_matches = self.compare_similarity(resume_embedding, job_embeddings, k, threshold, allowed_ids)
         # returns a list of dictionary of id, title, score
         #print(top_matches)
 
-        # Map the job id to the title and description for efficient lookup
-        job_lookup = jobs_df.set_index('job_id')[['title', 'description']].to_dict(orient='index')
-        #print(list(job_lookup.items()))[:2]
-
-        for match in top_matches:
-            job_id = match["job_id"]
-            if job_id in job_lookup:
-                match["description"] = job_lookup[job_id]["description"]
+        top_matches = self.attach_job_details(top_matches, jobs_df)
 
         result = {
             #"resume": resume_data, # incase we need to get the name, and other info etc,
@@ -66,17 +84,179 @@ class MatchingAlgorithm:
 
         return result
 
+    def run_batch(self, resume_ids, k=Config.MATCH_TOP_K, threshold=Config.MATCH_THRESHOLD, job_candidates=False):
+        """
+        Match many resumes against the jobs at once.
+        Jobs are loaded once and all scores come from one resumes x jobs matrix product.
+        Returns the top k jobs per resume and, if job_candidates, the top k resumes per job
+        """
+        parsed_resumes = self.db_query.get_parsed_resumes(resume_ids)
+        found_ids = [resume_id for resume_id in resume_ids if resume_id in parsed_resumes]
+        if not found_ids:
+            return {"top_matches": {}, "missing_resume_ids": list(resume_ids)}
+
+        resume_texts = [self.extract_resume_text(parsed_resumes[resume_id]) for resume_id in found_ids]
+        resume_matrix = self.get_resume_embeddings(found_ids, resume_texts)
+
+        job_embeddings = self.load_jobs()
+        result = {
+            "top_matches": {},
+            "missing_resume_ids": [resume_id for resume_id in resume_ids if resume_id not in parsed_resumes]
+        }
+
+        if isinstance(job_embeddings, IVFIndex):
+            # The approximate index searches one resume at a time, it has no matrix to multiply
+            all_matches = []
+            for resume_id, resume_vec in zip(found_ids, resume_matrix):
+                top_matches = job_embeddings.top_k(resume_vec, {}, k, threshold)
+                all_matches += top_matches
+                result["top_matches"][resume_id] = top_matches or "No strong matches found for this candidate."
+            # One query for the titles of every returned job
+            self.attach_job_details(all_matches, descriptions=False)
+            return result
+
+        # one jobs x resumes score matrix
+        scores = job_embeddings.scores_many(resume_matrix)
+        for column, resume_id in enumerate(found_ids):
+            top_matches = job_embeddings.select(scores[:, column], np.arange(len(scores)), k, threshold)
+            result["top_matches"][resume_id] = top_matches or "No strong matches found for this candidate."
+
+        if job_candidates:
+            result["job_candidates"] = job_embeddings.best_candidates(scores, found_ids, k, threshold)
+
+        return result
+
+    def hybrid_search(self, resume_data, resume_embedding, k, threshold, fuse=False, allowed_ids=None):
+        """
+        Pull the top BM25 candidates for the resume's skills and recent positions from Elasticsearch,
+        then re-rank only those by cosine similarity (or by reciprocal rank fusion of both rankings)
+        """
+        skills, positions = self.build_search_terms(resume_data)
+        es = ElasticsearchService()
+        candidates = es.search_candidate_jobs(skills, positions, Config.HYBRID_CANDIDATES)
+        if allowed_ids is not None:
+            allowed = set(allowed_ids)
+            candidates = [(job_id, score) for job_id, score in candidates if job_id in allowed]
+
+        jobs_df, job_matrix = self.embedding_store.load_jobs_by_ids([job_id for job_id, _ in candidates])
+        engine = SimilarityEngine(jobs_df['job_id'], jobs_df['title'], job_matrix)
+        if len(engine) == 0:
+            return jobs_df, "No strong matches found for this candidate."
+
+        if not fuse:
+            return jobs_df, self.compare_similarity(resume_embedding, engine, k, threshold)
+
+        cosine = engine.scores(resume_embedding)
+        cosine_rank = np.empty(len(cosine), dtype=np.int64)
+        cosine_rank[np.argsort(-cosine, kind="stable")] = np.arange(len(cosine))
+
+        bm25_rank = {job_id: rank for rank, (job_id, _) in enumerate(candidates)}
+        bm25_rank = np.array([bm25_rank[job_id] for job_id in engine.job_ids], dtype=np.int64)
+
+        fused = 1.0 / (Config.HYBRID_RRF_K + bm25_rank + 1) + 1.0 / (Config.HYBRID_RRF_K + cosine_rank + 1)
+
+        # Weak semantic matches stay out even if BM25 likes them
+        eligible = np.flatnonzero(cosine >= threshold)
+        best = eligible[np.argsort(-fused[eligible], kind="stable")][:k]
+        top_matches = [{
+            "job_id": engine.job_ids[position],
+            "job_title": engine.job_titles[position],
+            "score": round(float(cosine[position]), 3),
+            "fused_score": round(float(fused[position]), 5)
+        } for position in best]
+
+        return jobs_df, top_matches or "No strong matches found for this candidate."
+
+    @staticmethod
+    def build_search_terms(resume_data):
+        """Skills and the most recent positions of a parsed resume, for the BM25 query"""
+        skills = resume_data.get('skills') or []
+        positions = [exp.get('position') for exp in (resume_data.get('experience') or [])[:3]
+                     if exp.get('position')]
+        return skills, positions
+
+    def load_jobs(self):
+        """
+        The engine that scores the jobs for the configured MATCH_MODE.
+        No mode loads the job text, the details of the matched jobs are fetched afterwards
+        """
+        if Config.MATCH_MODE == "ivf":
+            # The vectors live in the index file
+            return IVFIndex.load_cached(Config.ANN_INDEX_PATH)
+
+        if Config.MATCH_MODE == "mmap":
+            # Every worker scores from the same memory-mapped file instead of its own copy, titles are in the file
+            return MappedSimilarityEngine(EmbeddingFile.open_cached(Config.EMBEDDING_FILE_PATH))
+
+        # The stored embeddings (computed once at ingestion) as an engine cached per process,
+        # filters select rows of it instead of reloading the jobs they allow
+        return self.embedding_store.load_engine()
+
+    def attach_job_details(self, top_matches, jobs_df=None, descriptions=True):
+        """
+        Add the description (and the title, if the engine has none) to each match.
+        Only the matched jobs are fetched, unless jobs_df already holds them
+        """
+        if not isinstance(top_matches, list) or not top_matches:
+            return top_matches
+
+        if jobs_df is None:
+            rows = self.db_query.get_jobs_by_job_ids([match["job_id"] for match in top_matches])
+            jobs_df = pd.DataFrame(rows, columns=['job_id', 'title', 'description'])
+            jobs_df = self.data_preprocessor.preprocess_data(jobs_df, ['title', 'description'])
+
+        # Map the job id to the title and description for efficient lookup
+        job_lookup = jobs_df.set_index('job_id')[['title', 'description']].to_dict(orient='index')
+        for match in top_matches:
+            job = job_lookup.get(match["job_id"])
+            if job:
+                if descriptions:
+                    match["description"] = job["description"]
+                if match.get("job_title") is None:
+                    match["job_title"] = job["title"]
+        return top_matches
+
+    def get_resume_embeddings(self, resume_ids, resume_texts):
+        """
+        Resume embeddings as one matrix, reusing stored vectors whose text has not changed
+        and embedding the rest in batched requests
+        """
+        stored = self.db_query.get_resume_embeddings(resume_ids, self.model)
+        hashes = [JobEmbeddingStore.content_hash(text) for text in resume_texts]
+
+        missing = [i for i, (resume_id, content_hash) in enumerate(zip(resume_ids, hashes))
+                   if stored.get(resume_id, (None, None))[0] != content_hash]
+
+        embeddings = {resume_id: embedding for resume_id, (_, embedding) in stored.items()}
+        if missing:
+            new_embeddings = self.generate_embeddings([resume_texts[i] for i in missing])["embeddings"]
+            resume_embeddings = []
+            for i, embedding in zip(missing, new_embeddings):
+                embeddings[resume_ids[i]] = embedding
+                resume_embeddings.append({
+                    "resume_id": resume_ids[i],
+                    "model": self.model,
+                    "content_hash": hashes[i],
+                    "embedding": embedding
+                })
+            insert_resume_embeddings(resume_embeddings)
+
+        return np.array([embeddings[resume_id] for resume_id in resume_ids], dtype=np.float32)
+
     def generate_embedding(self, text):
-        """Generate text embeddings using OpenAI"""
+        """Generate text embeddings with the configured backend (OpenAI texts come from the embedding cache)"""
         try:
-            response = self.client.embeddings.create(
-                input = text,
-                model = self.model
-            )
-            return {"embedding": response.data[0].embedding}
+            return {"embedding": self.embedding_client.embed([text])[0]}
         except Exception as e:
             raise Exception (f"Error generating embedding: {e}")
 
+    def generate_embeddings(self, texts):
+        """Generate embeddings for many texts (batched requests for OpenAI), in input order"""
+        try:
+            return {"embeddings": self.embedding_client.embed(texts)}
+        except Exception as e:
+            raise Exception (f"Error generating embeddings: {e}")
+
     def extract_resume_text(self, resume_data):
         """Extract Resume text for Matching from parsed resume data"""
 
@@ -122,32 +302,25 @@ class MatchingAlgorithm:
         resume_text = f"{skills} {experience} {education} {projects}".strip()
         return resume_text
 
-    def compare_similarity(self, resume_vec, job_vecs_w_ids):
+    def compare_similarity(self, resume_vec, job_vecs_w_ids, k=Config.MATCH_TOP_K, threshold=Config.MATCH_THRESHOLD,
+                           allowed_ids=None):
         """
         Calculate the cosine similarity_score between resume and all job description
-        vec1 - resume, vec2 - list of all embeddings job description
-        Return the top 10 jobs
+        vec1 - resume, vec2 - SimilarityEngine (or list of (job_id, title, embedding)) of all job descriptions
+        allowed_ids - only score these jobs (pre-filtered), None scores every job
+        Return the top k jobs
         """
-        matches = []
-
-        for job_id, job_title, job_vec in job_vecs_w_ids:
-            similarity_score = cosine_similarity([resume_vec], [job_vec])[0][0]
-            if similarity_score >= 0.45:
-                matches.append((job_id, job_title, similarity_score))
-
-        if not matches:
-            return "No strong matches found for this candidate."
-
-        matches.sort(key=lambda x: x[2], reverse=True)
-        top_10 = [{
-            "job_id": job_id,
-            "job_title": job_title,
-            "score": round(score, 3)
-        } for job_id, job_title, score in matches[:10]]
-
-        return top_10
-
+        if not isinstance(job_vecs_w_ids, SimilarityEngine):
+            job_ids, job_titles, job_vecs = zip(*job_vecs_w_ids) if job_vecs_w_ids else ((), (), ())
+            job_vecs_w_ids = SimilarityEngine(job_ids, job_titles, job_vecs)
 
+        positions = None
+        if allowed_ids is not None:
+            positions = job_vecs_w_ids.positions_of(allowed_ids)
 
+        top_k = job_vecs_w_ids.top_k(resume_vec, k, threshold, positions)
 
+        if not top_k:
+            return "No strong matches found for this candidate."
 
+        return top_k
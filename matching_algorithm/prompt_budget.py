@@ -0,0 +1,62 @@
+from shared.config import Config
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# ------ PROMPT TOKEN BUDGET ------
+
+
+class PromptBudget:
+    """Keeps a prompt under max_tokens by trimming its variable parts, longest first"""
+    def __init__(self, model=Config.MODEL_NAME, max_tokens=Config.RECOMMENDATION_PROMPT_TOKENS):
+        self.max_tokens = max_tokens
+
+        # Use the real tokenizer when it is installed, otherwise a conservative estimate
+        self.encoding = None
+        if tiktoken is not None:
+            try:
+                self.encoding = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self.encoding = tiktoken.get_encoding("cl100k_base")
+
+    def count_tokens(self, text):
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        # roughly 4 characters per token for english, 3 keeps the estimate on the safe side
+        return len(text) // 3 + 1
+
+    def truncate(self, text, max_tokens):
+        if max_tokens <= 0:
+            return ""
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text)
+            if len(tokens) > max_tokens:
+                return self.encoding.decode(tokens[:max_tokens]) + " ..."
+            return text
+        if len(text) > max_tokens * 3:
+            return text[:max_tokens * 3] + " ..."
+        return text
+
+    def fit(self, texts, fixed_text=""):
+        """
+        Trim texts so they and fixed_text (the prompt template) fit in max_tokens together.
+        Short texts are kept whole and the budget they leave is shared by the longer ones
+        """
+        remaining = self.max_tokens - self.count_tokens(fixed_text)
+        counts = [self.count_tokens(text) for text in texts]
+        if sum(counts) <= remaining:
+            return list(texts)
+
+        fitted = list(texts)
+        order = sorted(range(len(texts)), key=lambda i: counts[i])
+        for n, i in enumerate(order):
+            share = max(remaining // (len(order) - n), 0)
+            if counts[i] > share:
+                # " ..." costs about a token
+                fitted[i] = self.truncate(texts[i], share - 2)
+                remaining -= share
+            else:
+                remaining -= counts[i]
+        return fitted
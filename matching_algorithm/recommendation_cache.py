@@ -0,0 +1,133 @@
+import hashlib
+import json
+import time
+from shared.config import Config
+from matching_algorithm.sqlite_cache import SqliteLRUCache
+
+# ------ RECOMMENDATION RESULT CACHE ------
+
+
+class RecommendationCache(SqliteLRUCache):
+    """
+    Chat completions keyed by everything that goes into the prompt: the resume text, the ordered matched jobs
+    (id and a hash of each job's prompt entry), the chat model, the temperature and the prompt template version.
+    A bounded in-process LRU sits in front of a SQLite file shared by every worker, entries expire after ttl seconds
+    """
+    def __init__(self, max_items=Config.RECOMMENDATION_CACHE_SIZE, ttl=Config.RECOMMENDATION_CACHE_TTL,
+                 path=Config.RECOMMENDATION_CACHE_PATH):
+        self.ttl = ttl
+        # memory tier: key -> (created_at, content, job_ids)
+        super().__init__(max_items, path, counters=("expired", "invalidated"))
+
+    def create_tables(self, conn):
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS recommendations (
+                key TEXT PRIMARY KEY,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        # Which jobs each entry was generated from, so deleting or editing a job can drop its entries
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS recommendation_jobs (
+                key TEXT NOT NULL,
+                job_id TEXT NOT NULL,
+                PRIMARY KEY (key, job_id)
+            )
+            """
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS recommendation_jobs_job_id ON recommendation_jobs (job_id);")
+
+    @staticmethod
+    def key(resume_text, job_entries, model, temperature, prompt_version):
+        """
+        job_entries are (job_id, job prompt text) pairs in prompt order.
+        Only hashes go into the key, a changed description or score gives a new key
+        """
+        jobs = [[str(job_id), hashlib.sha256(str(text).encode("utf-8")).hexdigest()] for job_id, text in job_entries]
+        payload = json.dumps({
+            "resume": hashlib.sha256(str(resume_text).encode("utf-8")).hexdigest(),
+            "jobs": jobs,
+            "model": model,
+            "temperature": temperature,
+            "prompt_version": prompt_version
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Cached completion content, or None when missing or expired"""
+        now = time.time()
+        with self.lock:
+            if key in self.memory:
+                created_at, content, _ = self.memory[key]
+                if now - created_at <= self.ttl:
+                    self.memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return content
+                del self.memory[key]
+                self.counters["expired"] += 1
+
+        if self.path:
+            with self.connect() as conn:
+                row = conn.execute("SELECT content, created_at FROM recommendations WHERE key = ? AND created_at >= ?;",
+                                   (key, now - self.ttl)).fetchone()
+                job_ids = [job_id for job_id, in conn.execute(
+                    "SELECT job_id FROM recommendation_jobs WHERE key = ?;", (key,))] if row else []
+            if row:
+                with self.lock:
+                    self.counters["disk_hits"] += 1
+                    self.remember(key, (row[1], row[0], job_ids))
+                return row[0]
+
+        with self.lock:
+            self.counters["misses"] += 1
+        return None
+
+    def put(self, key, content, job_ids):
+        """Store a completion in both tiers, expired rows are purged from the SQLite tier on the way"""
+        now = time.time()
+        job_ids = [str(job_id) for job_id in job_ids]
+        with self.lock:
+            self.remember(key, (now, content, job_ids))
+
+        if self.path:
+            with self.connect() as conn:
+                expired = "SELECT key FROM recommendations WHERE created_at < ?"
+                conn.execute(f"DELETE FROM recommendation_jobs WHERE key IN ({expired});", (now - self.ttl,))
+                conn.execute("DELETE FROM recommendations WHERE created_at < ?;", (now - self.ttl,))
+
+                conn.execute("INSERT OR REPLACE INTO recommendations (key, content, created_at) VALUES (?, ?, ?);",
+                             (key, content, now))
+                conn.executemany("INSERT OR IGNORE INTO recommendation_jobs (key, job_id) VALUES (?, ?);",
+                                 [(key, job_id) for job_id in job_ids])
+
+    def invalidate_jobs(self, job_ids):
+        """
+        Drop every entry generated from any of these jobs, call when jobs are deleted or edited.
+        Other workers' memory tiers keep their copies until evicted, but those keys can no longer come up:
+        a deleted job is never matched again and an edited one hashes to a new key
+        """
+        job_ids = set(str(job_id) for job_id in job_ids)
+        if not job_ids:
+            return 0
+
+        with self.lock:
+            stale = [key for key, (_, _, entry_job_ids) in self.memory.items() if job_ids.intersection(entry_job_ids)]
+            for key in stale:
+                del self.memory[key]
+        stale = set(stale)
+
+        if self.path:
+            placeholders = ", ".join("?" for _ in job_ids)
+            with self.connect() as conn:
+                stale.update(key for key, in conn.execute(
+                    f"SELECT DISTINCT key FROM recommendation_jobs WHERE job_id IN ({placeholders});", list(job_ids)))
+                conn.executemany("DELETE FROM recommendations WHERE key = ?;", [(key,) for key in stale])
+                conn.executemany("DELETE FROM recommendation_jobs WHERE key = ?;", [(key,) for key in stale])
+
+        with self.lock:
+            self.counters["invalidated"] += len(stale)
+        return len(stale)
@@ -1,9 +1,20 @@
-from openai import OpenAI
+import asyncio
+import json
+from openai import OpenAI, AsyncOpenAI
 from shared.config import Config
+from backend.db.utils import QueryDatabase
+from matching_algorithm.recommendation_cache import RecommendationCache
+from matching_algorithm.prompt_budget import PromptBudget
 
 
 class Recommendation:
-    def __init__(self):
+    # Bump when create_prompt changes, so cached recommendations from the old prompt are not reused
+    PROMPT_VERSION = 2
+
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else RecommendationCache.shared()
+        self.budget = PromptBudget()
+        self.db_query = QueryDatabase()
         try:
             self.client = OpenAI(api_key=Config.get_api_key())
             self.model = Config.MODEL_NAME
@@ -12,33 +23,173 @@ class Recommendation:
         except Exception as e:
             raise RuntimeError(f"Error initializing Recommendation Module: {str(e)}")
 
-    def run(self, result):
-        resume_text = result["resume_text"]
-        top_matches = result["top_matches"][:3]
-        top_matches_formatted = self.format_job_matches(top_matches)
+    def run(self, result, fan_out=False):
+        if fan_out:
+            return asyncio.run(self.run_fan_out(result))
+
+        resume_text, top_matches, cache_key = self.prepare(result)
+
+        # Same resume, same jobs, same model settings and prompt: reuse the earlier answer
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return {"content": cached, "cached": True}
 
         response = self.client.chat.completions.create(
             model = self.model,
-            messages = [
-                {
-                    "role": "user",
-                    "content": self.create_prompt(resume_text, top_matches_formatted)
-                }
-            ],
+            messages = self.create_messages(resume_text, top_matches),
             temperature = self.temperature,
             max_tokens = self.max_tokens,
             response_format = {"type": "json_object"} # this good response format?
         )
-        return {"content": response.choices[0].message.content}
+        content = response.choices[0].message.content
+        # A reply cut off by max_tokens or the content filter is returned but not reused
+        if response.choices[0].finish_reason == "stop":
+            self.cache.put(cache_key, content, [job['job_id'] for job in top_matches])
+        return {"content": content, "cached": False}
+
+    async def run_fan_out(self, result):
+        """
+        One smaller request per matched job, at most RECOMMENDATION_CONCURRENCY at a time,
+        so latency is the slowest job instead of the sum of all of them.
+        Results are merged into the usual list of objects, a job that fails or times out is reported
+        under "failed" without holding back the others
+        """
+        resume_text, top_matches, cache_key = self.prepare(result, fan_out=True)
+
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return {"content": cached, "cached": True, "failed": []}
+
+        semaphore = asyncio.Semaphore(Config.RECOMMENDATION_CONCURRENCY)
+        client = AsyncOpenAI(api_key=Config.get_api_key())
+        try:
+            outcomes = await asyncio.gather(*[self.recommend_job(client, semaphore, resume_text, job)
+                                              for job in top_matches], return_exceptions=True)
+        finally:
+            await client.close()
+
+        recommendations, failed = [], []
+        for job, outcome in zip(top_matches, outcomes):
+            if isinstance(outcome, BaseException):
+                print(f"Error generating recommendation for job {job['job_id']}: {outcome!r}")
+                failed.append({"job_id": job['job_id'], "error": str(outcome) or type(outcome).__name__})
+            else:
+                recommendations.append(outcome)
+
+        content = json.dumps(recommendations)
+        # Only complete answers are cached, a failed job is retried on the next request
+        if not failed:
+            self.cache.put(cache_key, content, [job['job_id'] for job in top_matches])
+        return {"content": content, "cached": False, "failed": failed}
+
+    async def recommend_job(self, client, semaphore, resume_text, job):
+        """Recommendation object for a single job"""
+        async with semaphore:
+            response = await asyncio.wait_for(client.chat.completions.create(
+                model = self.model,
+                messages = self.create_messages(resume_text, [job]),
+                temperature = self.temperature,
+                max_tokens = Config.RECOMMENDATION_JOB_MAX_TOKENS,
+                response_format = {"type": "json_object"}
+            ), timeout=Config.RECOMMENDATION_TIMEOUT)
+
+        content = response.choices[0].message.content
+        # The model may wrap the object in a list or another object, take the one describing this job
+        found = JsonObjectStream().feed(content)
+        if found:
+            return found[0]
+        return json.loads(content)
+
+    def stream(self, result):
+        """
+        Same as run, but yields (event, data) pairs while the model writes:
+        ("token", text) for every delta, ("recommendation", dict) for each job object as soon as it is complete
+        and finally ("done", {"content": ..., "cached": ...})
+        """
+        resume_text, top_matches, cache_key = self.prepare(result)
+
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            for recommendation in JsonObjectStream().feed(cached):
+                yield "recommendation", recommendation
+            yield "done", {"content": cached, "cached": True}
+            return
+
+        response = self.client.chat.completions.create(
+            model = self.model,
+            messages = self.create_messages(resume_text, top_matches),
+            temperature = self.temperature,
+            max_tokens = self.max_tokens,
+            response_format = {"type": "json_object"},
+            stream = True
+        )
+        parser = JsonObjectStream()
+        parts = []
+        finish_reason = None
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].finish_reason:
+                finish_reason = chunk.choices[0].finish_reason
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            delta = chunk.choices[0].delta.content
+            parts.append(delta)
+            yield "token", delta
+            for recommendation in parser.feed(delta):
+                yield "recommendation", recommendation
+
+        content = "".join(parts)
+        # Only a stream the model finished itself is complete, a truncated one is not reused
+        if finish_reason == "stop":
+            self.cache.put(cache_key, content, [job['job_id'] for job in top_matches])
+        yield "done", {"content": content, "cached": False}
+
+    def prepare(self, result, fan_out=False):
+        """Resume text, the top 3 matches (with their digests) and the cache key for them"""
+        resume_text = result["resume_text"]
+        top_matches = self.attach_digests(result["top_matches"][:3])
+        job_entries = [(job['job_id'], self.format_job_match(job)) for job in top_matches]
+        # Fan-out answers come from different prompts, so they get their own entries
+        prompt_version = f"{self.PROMPT_VERSION}-{self.budget.max_tokens}"
+        if fan_out:
+            prompt_version += "-fan-out"
+        cache_key = self.cache.key(resume_text, job_entries, self.model, self.temperature, prompt_version)
+        return resume_text, top_matches, cache_key
+
+    def attach_digests(self, top_matches):
+        """Copies of the matches with the digest stored at ingestion, if the job has one"""
+        digests = self.db_query.get_job_digests([job['job_id'] for job in top_matches])
+        return [{**job, "digest": digests.get(job['job_id'])} for job in top_matches]
+
+    def create_messages(self, resume_text, top_matches):
+        # Trim the resume and job entries so the whole prompt stays under the token budget
+        resume_text, *job_entries = self.budget.fit([resume_text] + [self.format_job_match(job) for job in top_matches],
+                                                    fixed_text=self.create_prompt("", ""))
+        return [
+            {
+                "role": "user",
+                "content": self.create_prompt(resume_text, "\n\n".join(job_entries))
+            }
+        ]
 
     def format_job_matches(self, top_matches):
         job_list = []
         for job in top_matches:
-            j = f"Job ID: {job['job_id']}\nJob Title: {job['job_title']}\nScore{job['score']}\nDescription; {job['description']}"
-            job_list.append(j)
+            job_list.append(self.format_job_match(job))
 
         return "\n\n".join(job_list)
 
+    @staticmethod
+    def format_job_match(job):
+        digest = job.get('digest')
+        if not digest:
+            return f"Job ID: {job['job_id']}\nJob Title: {job['job_title']}\nScore{job['score']}\nDescription; {job['description']}"
+
+        # The digest is much shorter than the raw description
+        requirements = "\n".join(f"- {requirement}" for requirement in digest['requirements'] or [])
+        return (f"Job ID: {job['job_id']}\nJob Title: {job['job_title']}\nScore{job['score']}\n"
+                f"Seniority: {digest['seniority']}\nSkills: {', '.join(digest['skills'] or [])}\n"
+                f"Requirements:\n{requirements}\nSummary: {digest['summary']}")
+
 
     def create_prompt(self, resume, top_jobs):
         prompt = f"""
@@ -77,3 +228,44 @@ class Recommendation:
         IMPORTANT: Return valid format (list of JSON objects of each job), let your response be able to be converted to a dataframe without errors.
         """
         return prompt
+
+
+class JsonObjectStream:
+    """
+    Incremental parser for streamed JSON text. Tracks braces outside of strings
+    and returns every object carrying a "job_id" the moment its closing brace arrives,
+    wherever it is nested (a top-level list, {"matches": [...]} or a single object)
+    """
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.starts = []
+        self.in_string = False
+        self.escaped = False
+
+    def feed(self, text):
+        self.buffer += text
+        completed = []
+        for i in range(self.position, len(self.buffer)):
+            char = self.buffer[i]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == "{":
+                self.starts.append(i)
+            elif char == "}" and self.starts:
+                start = self.starts.pop()
+                try:
+                    obj = json.loads(self.buffer[start:i + 1])
+                except ValueError:
+                    continue
+                if isinstance(obj, dict) and "job_id" in obj:
+                    completed.append(obj)
+        self.position = len(self.buffer)
+        return completed
@@ -0,0 +1,105 @@
+import numpy as np
+
+# ------ VECTORIZED COSINE SIMILARITY ------
+
+
+class SimilarityEngine:
+    """
+    Keeps the job embeddings as one contiguous, pre-normalized float32 matrix
+    so a resume is scored against every job with a single matrix-vector product
+    """
+    def __init__(self, job_ids, job_titles, job_matrix):
+        self.job_ids = np.asarray(job_ids, dtype=object)
+        self.job_titles = np.asarray(job_titles, dtype=object)
+        self.job_matrix = self.normalize(job_matrix)
+        self.job_positions = None
+
+    def __len__(self):
+        return len(self.job_ids)
+
+    def positions_of(self, job_ids):
+        """Sorted row positions of the given job ids, unknown ids are skipped"""
+        if self.job_positions is None:
+            self.job_positions = {job_id: position for position, job_id in enumerate(self.job_ids)}
+        positions = [self.job_positions[job_id] for job_id in job_ids if job_id in self.job_positions]
+        return np.array(sorted(positions), dtype=np.int64)
+
+    @staticmethod
+    def normalize(matrix):
+        """Scale every row to unit length so a dot product is the cosine similarity"""
+        matrix = np.array(matrix, dtype=np.float32, order="C", ndmin=2)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        # Leave all-zero rows at zero instead of dividing by zero
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
+
+    def scores(self, resume_vec):
+        """Cosine similarity between the resume and every job"""
+        resume_vec = self.normalize(resume_vec)[0]
+        return self.job_matrix @ resume_vec
+
+    def scores_at(self, resume_vec, positions):
+        """Cosine similarity between the resume and only the jobs at positions"""
+        resume_vec = self.normalize(resume_vec)[0]
+        return self.job_matrix[positions] @ resume_vec
+
+    def scores_many(self, resume_matrix):
+        """Cosine similarity of every job (rows) against every resume (columns) in one matrix product"""
+        resume_matrix = self.normalize(resume_matrix)
+        if len(self) == 0:
+            return np.empty((0, len(resume_matrix)), dtype=np.float32)
+        return self.job_matrix @ resume_matrix.T
+
+    def top_k(self, resume_vec, k=10, threshold=0.45, positions=None):
+        """
+        Return the k best jobs scoring at or above threshold, best first,
+        as a list of dictionaries of job_id, job_title and score.
+        positions limits scoring to a pre-filtered subset of the jobs
+        """
+        if len(self) == 0:
+            return []
+
+        if positions is None:
+            scores = self.scores(resume_vec)
+            return self.select(scores, np.arange(len(scores)), k, threshold)
+
+        if len(positions) == 0:
+            return []
+        return self.select(self.scores_at(resume_vec, positions), positions, k, threshold)
+
+    def select(self, scores, positions, k, threshold):
+        """Threshold mask and argpartition top k over scores for the jobs at positions"""
+        mask = scores >= threshold
+        scores, positions = scores[mask], positions[mask]
+
+        if len(scores) > k:
+            best = np.argpartition(-scores, k - 1)[:k]
+            scores, positions = scores[best], positions[best]
+
+        order = np.argsort(-scores, kind="stable")
+        return [{
+            "job_id": self.job_ids[position],
+            "job_title": self.job_titles[position],
+            "score": round(float(score), 3)
+        } for position, score in zip(positions[order], scores[order])]
+
+    def best_candidates(self, scores, resume_ids, k=10, threshold=0.45):
+        """
+        For every job with at least one resume at or above threshold,
+        the k best resumes from a jobs x resumes score matrix, best first
+        """
+        resume_ids = np.asarray(resume_ids, dtype=object)
+        k = min(k, scores.shape[1])
+        job_candidates = dict()
+
+        for row in np.flatnonzero(scores.max(axis=1, initial=-1.0) >= threshold):
+            job_scores = scores[row]
+            best = np.argpartition(-job_scores, k - 1)[:k]
+            best = best[np.argsort(-job_scores[best], kind="stable")]
+            job_candidates[self.job_ids[row]] = [{
+                "resume_id": resume_ids[column],
+                "score": round(float(job_scores[column]), 3)
+            } for column in best if job_scores[column] >= threshold]
+
+        return job_candidates
@@ -0,0 +1,70 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# ------ TWO-TIER CACHE BASE: IN-PROCESS LRU + SHARED SQLITE FILE ------
+
+
+class SqliteLRUCache:
+    """
+    Bounded in-process LRU in front of an optional SQLite file that every worker shares.
+    Subclasses create their tables and handle their own keys and values, this class only keeps
+    the memory tier, the connections, the counters and one shared instance per process
+    """
+    COUNTERS = ("memory_hits", "disk_hits", "misses", "evictions")
+
+    # Process-wide instances per (cache class, constructor arguments)
+    _instances = dict()
+    _instances_lock = threading.Lock()
+
+    def __init__(self, max_items, path, counters=()):
+        self.max_items = max_items
+        self.path = path
+
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {name: 0 for name in self.COUNTERS + tuple(counters)}
+
+        if self.path:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with self.connect() as conn:
+                conn.execute("PRAGMA journal_mode=WAL;")
+                self.create_tables(conn)
+
+    def create_tables(self, conn):
+        """Create the cache's SQLite tables if they do not exist"""
+        raise NotImplementedError
+
+    @classmethod
+    def shared(cls, *args):
+        """The instance every request of this process uses, created on first call"""
+        with SqliteLRUCache._instances_lock:
+            key = (cls, args)
+            if key not in SqliteLRUCache._instances:
+                SqliteLRUCache._instances[key] = cls(*args)
+            return SqliteLRUCache._instances[key]
+
+    @contextmanager
+    def connect(self):
+        """Connection to the SQLite tier: committed if the block succeeds, closed either way"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def remember(self, key, value):
+        """Put a value in the memory tier as most recently used, evicting past max_items (lock held)"""
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_items:
+            self.memory.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def stats(self):
+        """Every counter plus how many entries the memory tier holds now"""
+        with self.lock:
+            return {**self.counters, "memory_items": len(self.memory)}
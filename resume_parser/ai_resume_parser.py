@@ -2,14 +2,15 @@ import traceback
 import json
 import re
 from openai import OpenAI
-from PyPDF2 import PdfReader
+from resume_parser.pdf_extraction import PdfTextExtractor
 from shared.config import Config
 from resume_parser.backup_parser import BackupParser
-from data_pipeline.data_preprocessing import DataPreprocessing
+from resume_parser.resume_sections import ResumeSegmenter
+from resume_parser import resume_dedup
 from backend.db.insert import insert_resumes, insert_resume_data
 
 class ResumeParser:
-    def __init__(self, file_obj):
+    def __init__(self, file_obj, filename=None):
         try:
             print("ResumeParser __init_ called")
             traceback.print_stack()
@@ -20,24 +21,44 @@ class ResumeParser:
             # Hardcoded for testing
             #self.pdf_path = Path(r"/resume_parser/test_resumes/Olivia_Chen_Resume.pdf")
             self.file = file_obj
+            self.filename = filename
+            self.pdf_extractor = PdfTextExtractor()
+            self.extraction = None
+            self.segmenter = ResumeSegmenter()
         except ValueError as e:
             raise RuntimeError(f"OpenAI client initialization failed: {str(e)}")
 
-    def run(self):
+    def run(self, force=False):
+        """
+        Parse the resume and store it. A resume already parsed from the same file or the same text
+        is returned as is (with "duplicate": True), force parses it again and replaces its data
+        """
         resumes = dict()
 
         # Get the filename
         file_name = self.get_filename()
         resumes["filename"] = file_name
 
+        # Same file bytes: nothing to extract or parse. Hashed straight from the file, no copy
+        resumes["file_hash"] = resume_dedup.file_hash(self.file)
+        existing = resume_dedup.find_parsed_resume("file_hash", resumes["file_hash"])
+        if existing and not force:
+            return existing
+
         # Extract text from resume pdf
         raw_text = self.extract_text_from_pdf()
         resumes["raw_text"] = raw_text
 
-        # Insert raw text into DB
+        # Same text in a different file
+        resumes["text_hash"] = resume_dedup.text_hash(raw_text)
+        existing = existing or resume_dedup.find_parsed_resume("text_hash", resumes["text_hash"])
+        if existing and not force:
+            return existing
+
+        # Insert raw text into DB, a forced re-parse keeps the existing resume id
         try:
             # Get the id too for foreign key
-            resume_id = insert_resumes(resumes)
+            resume_id = existing["resume_id"] if existing else insert_resumes(resumes)
         except Exception as e:
             print(f"Error inserting into table: {e}")
             return
@@ -47,7 +68,7 @@ class ResumeParser:
             resume_data = self.parse_resume(raw_text)
             if "error" not in resume_data:
                 # Insert into database
-                insert_resume_data(resume_id, resume_data)
+                insert_resume_data(resume_id, resume_data, replace=existing is not None)
             return {"resume_id": resume_id, "resume_data": resume_data}
         except Exception as e:
             print(f"Error parsing or inserting resume data:{e}")
@@ -55,6 +76,8 @@ class ResumeParser:
 
     def get_filename(self):
         """Get the filename of the file"""
+        if self.filename:
+            return self.filename
         if hasattr(self.file, "filename"):
             return self.file.filename
         """file_path_pathlib = Path(self.pdf_path)
@@ -62,12 +85,14 @@ class ResumeParser:
         return file_name"""
 
     def extract_text_from_pdf(self):
-        """Extract text from pdf file"""
+        """Extract text from pdf file, page timings are kept in self.extraction"""
         text = ""
         try:
-            reader = PdfReader(self.file)
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
+            self.extraction = self.pdf_extractor.extract(self.file)
+            text = self.extraction["text"]
+            if self.extraction["truncated"]:
+                print(f"PDF truncated to {len(self.extraction['pages'])} of {self.extraction['page_count']} pages, "
+                      f"{len(text)} characters")
         except Exception as e:
             print(f"Error reading PDF: {e}")
         return text
@@ -83,13 +108,16 @@ class ResumeParser:
                     "received": len(text.strip()) if text else 0
                 }
 
+            # Contact details and skill lists are read locally, the LLM only gets the sections it is needed for
+            prepared = self.segmenter.prepare(text) if Config.RESUME_SEGMENTER else None
+
             # Get AI response
-            response = self.get_ai_response(text)
+            response = self.get_ai_response(text, prompt=prepared["prompt"] if prepared else None)
             if "error" in response:
                 return response
 
             # Parse and validate
-            parsed_data = self.parse_and_validate(response, text)
+            parsed_data = self.parse_and_validate(response, text, local_fields=prepared["fields"] if prepared else None)
             if "error" in parsed_data:
                 return parsed_data
 
@@ -98,15 +126,15 @@ class ResumeParser:
         except Exception as e:
             raise Exception (f"Unexpected error: {e}")
 
-    def get_ai_response(self, text):
-        """Get response from OpenAI API"""
+    def get_ai_response(self, text, prompt=None):
+        """Get response from OpenAI API, prompt replaces the full resume prompt"""
         try:
             response = self.client.chat.completions.create(
                 model = self.model,
                 messages= [
                     {
                         "role": "user",
-                        "content": self.create_prompt(text)
+                        "content": prompt or self.create_prompt(text)
                     }
                 ],
                 temperature=self.temperature,
@@ -117,38 +145,38 @@ class ResumeParser:
         except Exception as e:
             raise Exception (f"OpenAI API error: {e}")
 
-    def parse_and_validate(self, response, original_text):
-        """Parse and validate the AI response"""
+    def parse_and_validate(self, response, original_text, local_fields=None):
+        """Parse and validate the AI response, local_fields are the ones read by the segmenter"""
         try:
             content = self.clean_json_response(response["content"])
             result = json.loads(content)
+            result.update(local_fields or {})
 
             # Validate minimum required fields
-            # Preprocess text for NLP and regex parsing
-            data_preprocessor = DataPreprocessing()
-            preprocessed_text = data_preprocessor.text_preprocessing(original_text)
+            # The backup parser works on the original text, its spaCy pipeline is shared by the process
+            backup_parser = BackupParser()
             missing_fields = list()
 
             if not result.get("name"):
-                result["name"] = BackupParser.extract_name(preprocessed_text) or "Not Found"
+                result["name"] = backup_parser.extract_name(original_text) or "Not Found"
 
             if result["name"] == "Not found":
                 missing_fields.append("name")
 
             if not result.get("email"):
-                result["email"] = BackupParser.extract_email(preprocessed_text) or "Not Found"
+                result["email"] = backup_parser.extract_email(original_text) or "Not Found"
 
             if result["email"] == "Not found":
                 missing_fields.append("email")
 
             if not result.get("phone"):
-                result["phone"] = BackupParser.extract_phone_number(preprocessed_text) or "Not Found"
+                result["phone"] = backup_parser.extract_phone_number(original_text) or "Not Found"
 
             if result["phone"] == "Not found":
                 missing_fields.append("phone")
 
             if not result.get("skills"):
-                result["skills"] = BackupParser.extract_skills(preprocessed_text)
+                result["skills"] = backup_parser.extract_skills(original_text)
 
             if result["skills"] == "Not found":
                 missing_fields.append("skills")
@@ -1,46 +1,37 @@
-from spacy.matcher import Matcher
-from pathlib import Path
 import re
-import spacy
+from shared import nlp_resources
+from shared.config import Config
+
+# Compiled once, the section segmenter reads contact details with them too
+PHONE_PATTERN = re.compile(r'(?:(?:\+?([1-9]|[0-9][0-9]|[0-9][0-9][0-9])\s*(?:[.-]\s*)?)?(?:\(\s*([2-9]1[02-9]|'
+                           r'[2-9][02-8]1|[2-9][02-8][02-9])\s*\)|([0-9][1-9]|[0-9]1[02-9]|[2-9][02-8]1|[2-9]'
+                           r'[02-8][02-9]))\s*(?:[.-]\s*)?)?([2-9]1[02-9]|[2-9][02-9]1|[2-9][02-9]{2})\s*'
+                           r'(?:[.-]\s*)?([0-9]{4})(?:\s*(?:#|x\.?|ext\.?|extension)\s*(\d+))?')
+EMAIL_PATTERN = re.compile(r"([^@|\s]+@[^@]+\.[^@|\s]+)")
 
 class BackupParser:
     """Handles PDF text extraction and NLP and regex parsing when AI parser does not work"""
     def __init__(self):
-        self.skills_file = Path(r"/resume_parser/patterns/skill_patterns.jsonl")
-        self.education_file = Path(r"/resume_parser/patterns/education_patterns.jsonl")
-
-        # Load spaCy and add EntityRuler before processing text
-        self.nlp = spacy.load("en_core_web_sm")
-
-        # Initialize matcher with a vocab
-        self.matcher = Matcher(self.nlp.vocab)
-
-        # Add Entity Ruler to pretrained model
-        if "skill_ruler" not in self.nlp.pipe_names:
-            self.skill_ruler = self.nlp.add_pipe("entity_ruler", name="skill_ruler", before="ner")
-            self.skill_ruler.from_disk(self.skills_file)
+        # spaCy and the name matcher are shared by the whole process,
+        # so creating a parser per resume is cheap
+        self.nlp = nlp_resources.spacy_nlp()
+        self.matcher = nlp_resources.name_matcher()
 
-    def extract_name(self, text):
-        """Extract name from resume text"""
-        nlp_text = self.nlp(text)
+    def extract_name(self, text, doc=None):
+        """Extract name from resume text (doc is the text already run through the pipeline)"""
+        nlp_text = doc if doc is not None else self.nlp(text)
 
         # First name and Last name are always proper nouns
-        pattern = [{'POS': 'PROPN'}, {'POS': 'PROPN'}]
-
-        self.matcher.add('NAME', [pattern])
-
         matches = self.matcher(nlp_text)
 
         for match_id, start, end in matches:
             span = nlp_text[start:end]
             return span.text
 
-    def extract_phone_number(self, text):
+    @staticmethod
+    def extract_phone_number(text):
         """Extract phone number from resume text"""
-        phone = re.findall(re.compile(r'(?:(?:\+?([1-9]|[0-9][0-9]|[0-9][0-9][0-9])\s*(?:[.-]\s*)?)?(?:\(\s*([2-9]1[02-9]|'
-                                      r'[2-9][02-8]1|[2-9][02-8][02-9])\s*\)|([0-9][1-9]|[0-9]1[02-9]|[2-9][02-8]1|[2-9]'
-                                      r'[02-8][02-9]))\s*(?:[.-]\s*)?)?([2-9]1[02-9]|[2-9][02-9]1|[2-9][02-9]{2})\s*'
-                                      r'(?:[.-]\s*)?([0-9]{4})(?:\s*(?:#|x\.?|ext\.?|extension)\s*(\d+))?'), text)
+        phone = PHONE_PATTERN.findall(text)
         if phone:
             number = ''.join(phone[0])
             if len(number) > 10:
@@ -48,25 +39,40 @@ class BackupParser:
             else:
                 return number
 
-    def extract_email(self, text):
+    @staticmethod
+    def extract_email(text):
         """Extract email address from resume text"""
-        email = re.findall(r"([^@|\s]+@[^@]+\.[^@|\s]+)", text)
+        email = EMAIL_PATTERN.findall(text)
         if email:
             try:
                 return email[0].split()[0].strip(';')
             except IndexError:
                 return None
 
-    def extract_skills(self, text):
-        """Extract skills from resume text using NLP patterns"""
+    @staticmethod
+    def extract_skills(text, doc=None):
+        """
+        Extract skills from resume (or job description) text using the skill patterns.
+        The patterns are matched on tokens by the compiled automaton, the rest of the spaCy pipeline is not run
+        """
         skill_matches = list()
-        doc = self.nlp(text)
-
-        for ent in doc.ents:
-            if ent.label_.startswith("SKILL"):
-                skill_matches.append(ent.text)
+        for match_text, label in nlp_resources.pattern_matches(nlp_resources.skill_automaton(), text, doc):
+            if label.startswith("SKILL"):
+                skill_matches.append(match_text)
         return list(set(skill_matches))
 
+    @staticmethod
+    def extract_education(text, doc=None):
+        """Degree mentions (BSc, MBA, ...) using the education patterns"""
+        matches = nlp_resources.pattern_matches(nlp_resources.education_automaton(), text, doc)
+        return list(dict.fromkeys(match_text for match_text, _ in matches))
+
+    @staticmethod
+    def extract_skills_many(texts):
+        """Skills of many texts (e.g. every job of a scrape), tokenized in batches"""
+        docs = nlp_resources.tokenizer().pipe((str(text) for text in texts), batch_size=Config.NLP_BATCH_SIZE)
+        return [BackupParser.extract_skills(None, doc) for doc in docs]
+
 """def main(path_to_file):
     # Read the file and convert to image
 
@@ -0,0 +1,197 @@
+import io
+import os
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from resume_parser.pdf_extraction import extraction_pool, extract_text
+from shared.config import Config
+from backend.db.insert import insert_resumes_batch, insert_resume_data_batch, insert_resume_data
+from resume_parser import resume_dedup
+
+# ------ BULK RESUME INGESTION ------
+
+
+class ArchiveTooLargeError(Exception):
+    """Raised when a zip archive has more than BULK_MAX_ZIP_MEMBERS entries"""
+
+
+class BulkResumeIngest:
+    """
+    Ingest many resumes at once: PDF text extraction on the shared, bounded process pool (it is CPU bound),
+    one insert for all the resumes, parsing with at most BULK_PARSE_CONCURRENCY OpenAI calls in flight,
+    then one insert for all the parsed data. Reports an outcome per file and the overall throughput
+    """
+    def __init__(self, parse_concurrency=Config.BULK_PARSE_CONCURRENCY):
+        self.parse_concurrency = parse_concurrency
+
+    @staticmethod
+    def expand_zip(filename, file_bytes, max_members=Config.BULK_MAX_ZIP_MEMBERS, max_bytes=Config.PDF_MAX_BYTES):
+        """
+        (filename, bytes) of every PDF in a zip archive. Archives with more than max_members entries are refused,
+        PDFs that would unpack to more than max_bytes are not read and come back with None instead of bytes
+        """
+        with zipfile.ZipFile(io.BytesIO(file_bytes)) as archive:
+            members = archive.infolist()
+            if len(members) > max_members:
+                raise ArchiveTooLargeError(f"{filename} has {len(members)} entries, at most {max_members} are accepted")
+            return [(os.path.basename(member.filename),
+                     archive.read(member) if member.file_size <= max_bytes else None)
+                    for member in members
+                    if member.filename.lower().endswith(".pdf") and not os.path.basename(member.filename).startswith(".")]
+
+    def run(self, files, force=False):
+        """
+        files is a list of (filename, bytes), zip archives are expanded.
+        Resumes parsed before (same bytes or same text) are reported as duplicates without parsing,
+        force parses them again and replaces their data
+        """
+        start = time.perf_counter()
+        timings = dict()
+
+        pdfs = []
+        for filename, file_bytes in files:
+            if str(filename).lower().endswith(".zip"):
+                pdfs.extend(self.expand_zip(filename, file_bytes))
+            else:
+                pdfs.append((filename, file_bytes))
+        outcomes = [{"filename": filename, "status": "pending", "resume_id": None, "error": None}
+                    for filename, _ in pdfs]
+
+        sized = []
+        for i, (_, file_bytes) in enumerate(pdfs):
+            if file_bytes is None or len(file_bytes) > Config.PDF_MAX_BYTES:
+                outcomes[i].update(status="failed", error=f"Resume is larger than {Config.PDF_MAX_BYTES} bytes")
+            else:
+                sized.append(i)
+
+        # Same bytes as a stored resume or an earlier file of this upload: no extraction needed
+        file_hashes = [resume_dedup.file_hash(file_bytes) if file_bytes is not None else None
+                       for _, file_bytes in pdfs]
+        existing = dict()
+        copies = dict()
+        stored = resume_dedup.find_parsed_resumes("file_hash", set(file_hashes[i] for i in sized))
+        pending = self.dedupe(sized, file_hashes, stored, existing, copies, outcomes, force)
+
+        # Extract text in parallel processes, concurrent uploads queue on the same pool instead of forking their own
+        stage = time.perf_counter()
+        texts = [None] * len(pdfs)
+        futures = {i: extraction_pool().submit(extract_text, pdfs[i][1]) for i in pending}
+        for i, future in futures.items():
+            try:
+                texts[i] = future.result()
+            except Exception as e:
+                outcomes[i].update(status="failed", error=f"Error reading PDF: {e}")
+        timings["extract_seconds"] = round(time.perf_counter() - stage, 3)
+
+        # Same text as a stored resume or an earlier file of this upload
+        text_hashes = [resume_dedup.text_hash(text) if text is not None else None for text in texts]
+        readable = [i for i in pending if texts[i] is not None]
+        stored = resume_dedup.find_parsed_resumes("text_hash", set(text_hashes[i] for i in readable if i not in existing))
+        readable = self.dedupe(readable, text_hashes, stored, existing, copies, outcomes, force)
+
+        # Store the raw text of every new readable file in one statement
+        stage = time.perf_counter()
+        new = [i for i in readable if i not in existing]
+        resume_ids = insert_resumes_batch([{"filename": pdfs[i][0], "raw_text": texts[i], "file_hash": file_hashes[i],
+                                            "text_hash": text_hashes[i]} for i in new])
+        if len(resume_ids) != len(new):
+            for i in new:
+                outcomes[i].update(status="failed", error="Error inserting resume to database")
+            readable = [i for i in readable if i in existing]
+            resume_ids = []
+        for i, resume_id in zip(new, resume_ids):
+            outcomes[i]["resume_id"] = resume_id
+        timings["insert_resumes_seconds"] = round(time.perf_counter() - stage, 3)
+
+        # Parse with bounded concurrency
+        stage = time.perf_counter()
+        parsed = self.parse_all([texts[i] for i in readable])
+        to_insert = []
+        for i, resume_data in zip(readable, parsed):
+            if isinstance(resume_data, Exception):
+                outcomes[i].update(status="failed", error=str(resume_data))
+            elif "error" in resume_data:
+                outcomes[i].update(status="failed", error=resume_data["error"])
+            else:
+                to_insert.append(i)
+                outcomes[i]["resume_data"] = resume_data
+        timings["parse_seconds"] = round(time.perf_counter() - stage, 3)
+
+        # Store parsed data in one statement, one row at a time if that fails (e.g. a duplicate email).
+        # Forced re-parses replace the data of their existing resume
+        stage = time.perf_counter()
+        rows = [(outcomes[i]["resume_id"], outcomes[i]["resume_data"]) for i in to_insert if i not in existing]
+        one_by_one = [i for i in to_insert if i in existing]
+        if rows and insert_resume_data_batch(rows):
+            for i in to_insert:
+                if i not in existing:
+                    outcomes[i]["status"] = "parsed"
+        else:
+            one_by_one = to_insert
+        for i in one_by_one:
+            if insert_resume_data(outcomes[i]["resume_id"], outcomes[i]["resume_data"], replace=i in existing):
+                outcomes[i]["status"] = "parsed"
+            else:
+                outcomes[i].update(status="failed", error="Error inserting resume data to database")
+        timings["insert_data_seconds"] = round(time.perf_counter() - stage, 3)
+
+        # Repeated files of this upload share the outcome of their first copy
+        for i, first in copies.items():
+            outcomes[i].update(status="duplicate" if outcomes[first]["status"] == "parsed" else outcomes[first]["status"],
+                               resume_id=outcomes[first]["resume_id"], error=outcomes[first]["error"])
+
+        elapsed = time.perf_counter() - start
+        return {
+            "outcomes": outcomes,
+            "summary": {
+                "files": len(pdfs),
+                "parsed": sum(outcome["status"] == "parsed" for outcome in outcomes),
+                "duplicates": sum(outcome["status"] == "duplicate" for outcome in outcomes),
+                "failed": sum(outcome["status"] == "failed" for outcome in outcomes),
+                "seconds": round(elapsed, 3),
+                "files_per_second": round(len(pdfs) / elapsed, 2) if elapsed > 0 else None,
+                **timings
+            }
+        }
+
+    @staticmethod
+    def dedupe(positions, hashes, stored, existing, copies, outcomes, force):
+        """
+        Positions still to be parsed. A hash of an already stored resume is a duplicate
+        (or, with force, remembered in existing so its data gets replaced),
+        a hash seen earlier in this upload is recorded in copies
+        """
+        first_seen = dict()
+        remaining = []
+        for i in positions:
+            if i in existing:
+                remaining.append(i)
+            elif hashes[i] in first_seen:
+                copies[i] = first_seen[hashes[i]]
+            elif hashes[i] in stored and not force:
+                outcomes[i].update(status="duplicate", resume_id=stored[hashes[i]]["resume_id"])
+            else:
+                if hashes[i] in stored:
+                    existing[i] = stored[hashes[i]]["resume_id"]
+                    outcomes[i]["resume_id"] = existing[i]
+                first_seen[hashes[i]] = i
+                remaining.append(i)
+        return remaining
+
+    def parse_all(self, texts):
+        """Parsed data (or the exception raised) for every text, in order"""
+        if not texts:
+            return []
+
+        # Imported here so extraction worker processes never load the parser's models
+        from resume_parser.ai_resume_parser import ResumeParser
+        parser = ResumeParser(None)
+
+        def parse(text):
+            try:
+                return parser.parse_resume(text)
+            except Exception as e:
+                return e
+
+        with ThreadPoolExecutor(max_workers=self.parse_concurrency) as executor:
+            return list(executor.map(parse, texts))
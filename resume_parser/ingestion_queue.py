@@ -0,0 +1,218 @@
+import json
+import os
+import shutil
+import threading
+import uuid
+import psycopg2
+from backend.db.config import load_config
+from shared.config import Config
+
+# ------ ASYNCHRONOUS RESUME INGESTION QUEUE ------
+
+# pg_advisory_xact_lock key that serializes the depth check and insert of every enqueue
+ENQUEUE_LOCK_KEY = 720417
+
+
+class QueueFullError(Exception):
+    """Raised when RESUME_QUEUE_DEPTH tasks are already waiting"""
+
+
+class ResumeIngestionQueue:
+    """
+    Resume uploads are saved to disk and recorded in the resume_tasks table, then a pool of worker threads
+    runs ResumeParser on them. Tasks live in Postgres, so they survive a restart, and workers of every
+    uvicorn process share them: a task is claimed with FOR UPDATE SKIP LOCKED, and one whose worker
+    died (still "running" after RESUME_TASK_TIMEOUT) is picked up again, or failed once it used every attempt
+    """
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, n_workers=Config.RESUME_WORKERS, max_queued=Config.RESUME_QUEUE_DEPTH,
+                 upload_dir=Config.RESUME_UPLOAD_DIR):
+        self.config = load_config()
+        self.n_workers = n_workers
+        self.max_queued = max_queued
+        self.upload_dir = upload_dir
+        self.workers = []
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+
+    @classmethod
+    def shared(cls):
+        """Process-wide queue, its workers are started once"""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    def start(self):
+        if self.workers:
+            return
+        for i in range(self.n_workers):
+            worker = threading.Thread(target=self.work, name=f"resume-worker-{i}", daemon=True)
+            worker.start()
+            self.workers.append(worker)
+        print(f"Started {self.n_workers} resume ingestion workers.")
+
+    def stop(self):
+        self.stopping.set()
+        self.wake.set()
+
+    def enqueue(self, filename, file_obj, force=False):
+        """
+        Save the upload (a binary file object, streamed to disk) and queue it, returns the task id.
+        force re-parses a resume seen before
+        """
+        os.makedirs(self.upload_dir, exist_ok=True)
+        file_path = os.path.join(self.upload_dir, f"{uuid.uuid4().hex}.pdf")
+        file_obj.seek(0)
+        with open(file_path, "wb") as file:
+            shutil.copyfileobj(file_obj, file)
+
+        try:
+            with psycopg2.connect(**self.config) as conn:
+                with conn.cursor() as cur:
+                    # A COUNT(*) guard alone lets concurrent uploads all see room under READ COMMITTED,
+                    # the transaction lock makes them check and insert one at a time
+                    cur.execute("SELECT pg_advisory_xact_lock(%s);", (ENQUEUE_LOCK_KEY,))
+                    cur.execute(
+                        """
+                        INSERT INTO resume_tasks (filename, file_path, force)
+                        SELECT %s, %s, %s
+                        WHERE (SELECT COUNT(*) FROM resume_tasks WHERE status = 'queued') < %s
+                        RETURNING id;
+                        """, (filename, file_path, force, self.max_queued))
+                    row = cur.fetchone()
+                conn.commit()
+        except (Exception, psycopg2.DatabaseError) as error:
+            os.remove(file_path)
+            raise Exception(f"Error queueing resume: {error}")
+
+        if row is None:
+            os.remove(file_path)
+            raise QueueFullError(f"{self.max_queued} resumes are already waiting to be parsed.")
+
+        self.wake.set()
+        return row[0]
+
+    def get_task(self, task_id):
+        """Status of a task, with the parsed result once it is done"""
+        try:
+            with psycopg2.connect(**self.config) as conn:
+                with conn.cursor() as cur:
+                    cur.execute(
+                        """
+                        SELECT id, filename, status, result, error, attempts, created_at, updated_at
+                        FROM resume_tasks WHERE id = %s;
+                        """, (task_id,))
+                    row = cur.fetchone()
+
+                    if not row:
+                        return None
+                    columns = [desc[0] for desc in cur.description]
+                    return dict(zip(columns, row))
+
+        except (Exception, psycopg2.DatabaseError) as error:
+            print("Database error:", error)
+            return None
+
+    def claim(self):
+        """Take the oldest queued (or abandoned) task, None if there is nothing to do"""
+        with psycopg2.connect(**self.config) as conn:
+            with conn.cursor() as cur:
+                # Abandoned tasks without attempts left would otherwise stay "running" forever
+                cur.execute(
+                    """
+                    UPDATE resume_tasks
+                    SET status = 'failed', error = 'The worker stopped before finishing the last attempt.',
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE status = 'running' AND updated_at < CURRENT_TIMESTAMP - %s * INTERVAL '1 second'
+                      AND attempts >= %s
+                    RETURNING file_path;
+                    """, (Config.RESUME_TASK_TIMEOUT, Config.RESUME_TASK_ATTEMPTS))
+                abandoned = [file_path for file_path, in cur.fetchall()]
+
+                cur.execute(
+                    """
+                    UPDATE resume_tasks
+                    SET status = 'running', attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = (
+                        SELECT id FROM resume_tasks
+                        WHERE (status = 'queued'
+                               OR (status = 'running' AND updated_at < CURRENT_TIMESTAMP - %s * INTERVAL '1 second'))
+                          AND attempts < %s
+                        ORDER BY id
+                        FOR UPDATE SKIP LOCKED
+                        LIMIT 1
+                    )
+                    RETURNING id, filename, file_path, force;
+                    """, (Config.RESUME_TASK_TIMEOUT, Config.RESUME_TASK_ATTEMPTS))
+                row = cur.fetchone()
+            conn.commit()
+
+        for file_path in abandoned:
+            self.remove_upload(file_path)
+        return row
+
+    def finish(self, task_id, status, result=None, error=None):
+        with psycopg2.connect(**self.config) as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE resume_tasks
+                    SET status = %s, result = %s, error = %s, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = %s;
+                    """, (status, json.dumps(result, default=str) if result is not None else None, error, task_id))
+            conn.commit()
+
+    def work(self):
+        """Worker loop: claim, parse, record, until stopped"""
+        # Imported here so the API can start without loading the parser's NLP models
+        from resume_parser.ai_resume_parser import ResumeParser
+
+        while not self.stopping.is_set():
+            try:
+                task = self.claim()
+            except Exception as e:
+                print(f"Error claiming resume task: {e}")
+                task = None
+
+            if task is None:
+                # Sleep until an upload in this process wakes us, or poll for uploads to other processes
+                self.wake.wait(Config.RESUME_QUEUE_POLL)
+                self.wake.clear()
+                continue
+
+            task_id, filename, file_path, force = task
+            # The saved upload is kept only while the task can still be retried
+            terminal = False
+            try:
+                # The parser reads the saved file in place, long documents are opened by path in the extraction pool
+                with open(file_path, "rb") as file:
+                    parsed_data = ResumeParser(file, filename=filename).run(force=force)
+                if parsed_data is None:
+                    self.finish(task_id, "failed", error="Resume could not be stored or parsed.")
+                elif "error" in parsed_data["resume_data"]:
+                    self.finish(task_id, "failed", result=parsed_data, error=parsed_data["resume_data"]["error"])
+                else:
+                    self.finish(task_id, "done", result=parsed_data)
+                terminal = True
+            except Exception as e:
+                print(f"Error parsing resume task {task_id}: {e}")
+                try:
+                    self.finish(task_id, "failed", error=str(e))
+                    terminal = True
+                except Exception as error:
+                    print(f"Error recording failure of resume task {task_id}: {error}")
+            finally:
+                if terminal:
+                    self.remove_upload(file_path)
+
+    @staticmethod
+    def remove_upload(file_path):
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error removing resume upload {file_path}: {e}")
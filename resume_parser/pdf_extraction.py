@@ -0,0 +1,202 @@
+import io
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from PyPDF2 import PdfReader
+from shared.config import Config
+
+try:
+    import fitz # PyMuPDF, optional faster backend
+except ImportError:
+    fitz = None
+
+# ------ PDF TEXT EXTRACTION ENGINE ------
+
+BACKENDS = ("pypdf2", "pymupdf")
+
+# One bounded process pool per API process, shared by long documents and bulk uploads and created on first use.
+# Workers are spawned, not forked: the API process runs threads (resume workers, bulk requests) and a fork
+# would copy their locks mid-use. A spawned worker only imports this module
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def extraction_pool():
+    """The process-wide PDF extraction pool, Config.PDF_WORKERS processes"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=Config.PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def shutdown_pool():
+    """Stop the pool's worker processes, e.g. at API shutdown"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _open(source, backend):
+    """source is a path, bytes or a seekable binary file object"""
+    if backend == "pymupdf":
+        if fitz is None:
+            raise ValueError("The pymupdf PDF backend needs the PyMuPDF package.")
+        if isinstance(source, str):
+            return fitz.open(source)
+        if isinstance(source, bytes):
+            return fitz.open(stream=source, filetype="pdf")
+        source.seek(0)
+        return fitz.open(stream=source.read(), filetype="pdf")
+    if backend == "pypdf2":
+        return PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+    raise ValueError(f"Unknown PDF backend: {backend}")
+
+
+def _page_count(document, backend):
+    return document.page_count if backend == "pymupdf" else len(document.pages)
+
+
+def _page_text(document, number, backend):
+    if backend == "pymupdf":
+        return document.load_page(number).get_text()
+    return document.pages[number].extract_text() or ""
+
+
+def _extract_pages(document, backend, start, stop, max_chars):
+    """Text and timing of pages start..stop-1, stopping once max_chars characters are reached"""
+    pages = []
+    chars = 0
+    for number in range(start, stop):
+        page_start = time.perf_counter()
+        text = _page_text(document, number, backend)
+        pages.append({"page": number + 1, "text": text, "chars": len(text),
+                      "ms": round((time.perf_counter() - page_start) * 1000, 3)})
+        chars += len(text)
+        if chars >= max_chars:
+            break
+    return pages
+
+
+def _extract_range(source, backend, start, stop, max_chars):
+    """Worker process entry point: open the document on its own and extract one range of pages"""
+    return _extract_pages(_open(source, backend), backend, start, stop, max_chars)
+
+
+def extract_text(file_bytes):
+    """Worker process entry point for bulk uploads: the text of one whole PDF"""
+    # Files are already spread over the pool, so pages of one file are not split further
+    extractor = PdfTextExtractor(parallel_min_pages=float("inf"))
+    return extractor.extract(io.BytesIO(file_bytes))["text"]
+
+
+class PdfTextExtractor:
+    """
+    Extracts resume text straight from the uploaded (spooled) file object.
+    Stops at max_pages pages or max_chars characters, refuses files over max_bytes,
+    and splits long documents into page ranges extracted in parallel processes.
+    Every page's character count and extraction time is reported
+    """
+    def __init__(self, backend=Config.PDF_BACKEND, max_pages=Config.PDF_MAX_PAGES, max_chars=Config.PDF_MAX_CHARS,
+                 max_bytes=Config.PDF_MAX_BYTES, parallel_min_pages=Config.PDF_PARALLEL_MIN_PAGES):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown PDF backend: {backend}")
+        self.backend = backend
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.max_bytes = max_bytes
+        self.parallel_min_pages = parallel_min_pages
+
+    def extract(self, file_obj):
+        """
+        Returns {"text", "pages": [{"page", "chars", "ms"}], "page_count", "truncated", "backend", "ms"}
+        file_obj can also be a path or bytes
+        """
+        start = time.perf_counter()
+        size = self.size_of(file_obj)
+        if size > self.max_bytes:
+            raise ValueError(f"PDF is {size} bytes, the limit is {self.max_bytes}.")
+
+        document = _open(file_obj, self.backend)
+        page_count = _page_count(document, self.backend)
+        stop = min(page_count, self.max_pages)
+
+        if stop >= self.parallel_min_pages:
+            pages = self.extract_parallel(file_obj, stop)
+        else:
+            pages = _extract_pages(document, self.backend, 0, stop, self.max_chars)
+
+        text = "\n".join(page.pop("text") for page in pages)
+        truncated = len(pages) < page_count or len(text) > self.max_chars
+        return {
+            "text": text[:self.max_chars],
+            "pages": pages,
+            "page_count": page_count,
+            "truncated": truncated,
+            "backend": self.backend,
+            "ms": round((time.perf_counter() - start) * 1000, 3)
+        }
+
+    def extract_parallel(self, file_obj, stop):
+        """Split pages 0..stop-1 into one range per worker, each worker opens the file itself"""
+        # A file on disk is opened by path in the workers, anything else has to be sent as bytes
+        source = file_obj
+        if not isinstance(file_obj, (str, bytes)):
+            path = getattr(file_obj, "name", None)
+            if isinstance(path, str) and os.path.isfile(path):
+                source = path
+            else:
+                file_obj.seek(0)
+                source = file_obj.read()
+
+        n_ranges = min(Config.PDF_WORKERS, stop)
+        bounds = [round(i * stop / n_ranges) for i in range(n_ranges + 1)]
+        futures = [extraction_pool().submit(_extract_range, source, self.backend, bounds[i], bounds[i + 1], self.max_chars)
+                   for i in range(n_ranges)]
+
+        pages = []
+        chars = 0
+        for future in futures:
+            for page in future.result():
+                pages.append(page)
+                chars += page["chars"]
+                if chars >= self.max_chars:
+                    return pages
+        return pages
+
+    @staticmethod
+    def size_of(file_obj):
+        """Size in bytes without reading the file"""
+        if isinstance(file_obj, bytes):
+            return len(file_obj)
+        if isinstance(file_obj, str):
+            return os.path.getsize(file_obj)
+        position = file_obj.tell()
+        file_obj.seek(0, os.SEEK_END)
+        size = file_obj.tell()
+        file_obj.seek(position)
+        return size
+
+
+if __name__ == '__main__':
+    # Compare backends on some PDFs: python -m resume_parser.pdf_extraction resume1.pdf resume2.pdf
+    import sys
+
+    paths = sys.argv[1:]
+    for backend in BACKENDS:
+        if backend == "pymupdf" and fitz is None:
+            print("pymupdf: not installed")
+            continue
+        extractor = PdfTextExtractor(backend=backend)
+        start = time.perf_counter()
+        page_total = 0
+        for path in paths:
+            with open(path, "rb") as file:
+                page_total += len(extractor.extract(file)["pages"])
+        elapsed = time.perf_counter() - start
+        print(f"{backend}: {len(paths)} files, {page_total} pages in {elapsed:.3f}s "
+              f"({page_total / elapsed if elapsed else 0:.1f} pages/s)")
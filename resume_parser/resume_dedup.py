@@ -0,0 +1,47 @@
+import hashlib
+import re
+import unicodedata
+from backend.db.utils import QueryDatabase
+
+# ------ RESUME DEDUPLICATION ------
+# Uploads are fingerprinted twice: the raw file bytes (checked before any PDF work)
+# and the normalized extracted text (catches the same resume exported to a new file).
+# Both hashes are stored on the resumes table with hash indexes.
+
+
+def file_hash(file_bytes):
+    """file_bytes can also be a binary file object, it is hashed in chunks and rewound"""
+    if isinstance(file_bytes, bytes):
+        return hashlib.sha256(file_bytes).hexdigest()
+
+    digest = hashlib.sha256()
+    file_bytes.seek(0)
+    for chunk in iter(lambda: file_bytes.read(1024 * 1024), b""):
+        digest.update(chunk)
+    file_bytes.seek(0)
+    return digest.hexdigest()
+
+
+def text_hash(text):
+    """Hash of the text with unicode, case and whitespace differences removed"""
+    text = unicodedata.normalize("NFKC", str(text)).lower()
+    return hashlib.sha256(re.sub(r"\s+", " ", text).strip().encode("utf-8")).hexdigest()
+
+
+def find_parsed_resumes(column, hashes):
+    """
+    Already parsed resumes matching any of the hashes, as {hash: {"resume_id", "resume_data", "duplicate"}}.
+    column is "file_hash" or "text_hash"
+    """
+    if not hashes:
+        return {}
+
+    found = dict()
+    for hash_value, row in QueryDatabase().get_parsed_resumes_by_hash(column, list(hashes)).items():
+        resume_data = {key: value for key, value in row.items() if key != "resume_id"}
+        found[hash_value] = {"resume_id": row["resume_id"], "resume_data": resume_data, "duplicate": True}
+    return found
+
+
+def find_parsed_resume(column, hash_value):
+    return find_parsed_resumes(column, [hash_value]).get(hash_value)
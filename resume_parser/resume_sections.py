@@ -0,0 +1,156 @@
+import re
+from resume_parser.backup_parser import BackupParser
+
+# ------ RESUME SECTION SEGMENTER ------
+# Splits raw resume text into sections on their headings so that contact details and skill lists
+# are read locally and only the sections that need the LLM go into a compact prompt.
+
+# Keyword of a heading line (first or last word of it) -> section
+HEADING_KEYWORDS = {
+    "contact": "contact", "skills": "skills", "competencies": "skills", "technologies": "skills",
+    "experience": "experience", "employment": "experience", "history": "experience",
+    "education": "education", "academic": "education", "qualifications": "education",
+    "projects": "projects", "project": "projects",
+    "certifications": "certifications", "certificates": "certifications", "licenses": "certifications",
+    "summary": "summary", "profile": "summary", "objective": "summary", "about": "summary",
+    "interests": "other", "hobbies": "other", "references": "other", "awards": "other",
+    "volunteer": "other", "volunteering": "other", "publications": "other",
+}
+# Sections the compact prompt asks the LLM about, in output order
+LLM_SECTIONS = ("experience", "education", "projects", "certifications")
+MAX_HEADING_WORDS = 4
+MAX_HEADER_LINES = 10 # more lines before the first heading means the segmentation is not trustworthy
+MAX_SKILL_WORDS = 5
+MIN_LOCAL_SKILLS = 3
+
+BULLET_PATTERN = re.compile(r"^\s*(?:[-*•▪●◦‣]|\d+[.)])\s*")
+SKILL_SPLIT_PATTERN = re.compile(r"\s*[,;|•]\s*(?![^()]*\))")
+NAME_PATTERN = re.compile(r"^[A-Za-zÀ-ÿ][A-Za-zÀ-ÿ.'-]*(?: [A-Za-zÀ-ÿ][A-Za-zÀ-ÿ.'-]*){1,3}$")
+
+FIELD_SCHEMAS = {
+    "name": '"name": "full name or null"',
+    "location": '"location": "city, region, country or null"',
+    "skills": '"skills": ["technical or professional skill"]',
+    "experience": '"experience": [{"company": "", "position": "", "location": null, "duration": "e.g. 05/2020 - Present", '
+                  '"responsibilities": [""]}]',
+    "education": '"education": [{"institution": "", "degree": "", "field": null, "year": null, "gpa": null}]',
+    "projects": '"projects": [{"name": "", "description": "", "url": null}]',
+    "certifications": '"certifications": [{"name": "", "issuer": null, "date": null}]',
+}
+
+
+class ResumeSegmenter:
+    """Deterministic pre-pass of the resume parser: section splitting, contact fields and skill lists"""
+
+    @staticmethod
+    def heading_of(line):
+        """Section of a heading line, None for any other line"""
+        words = re.sub(r"[^a-z ]", " ", line.lower().replace("&", " and ")).split()
+        if not words or len(words) > MAX_HEADING_WORDS or any(char.isdigit() for char in line):
+            return None
+        if BULLET_PATTERN.match(line) or line.rstrip().endswith((".", ",")):
+            return None
+        return HEADING_KEYWORDS.get(words[0]) or HEADING_KEYWORDS.get(words[-1])
+
+    def segment(self, text):
+        """
+        {section: text} with the lines before the first heading under "header",
+        or None when the text does not look like a sectioned resume
+        """
+        lines = [line.strip() for line in str(text).splitlines() if line.strip()]
+        sections = {"header": []}
+        current = "header"
+        headings = 0
+        for line in lines:
+            # "Skills: Python, SQL" is a heading with its first line on it
+            head, _, rest = line.partition(":")
+            section = self.heading_of(line) or (self.heading_of(head) if rest.strip() else None)
+            if section:
+                current = section
+                headings += 1
+                sections.setdefault(current, [])
+                if section != self.heading_of(line):
+                    sections[current].append(rest.strip())
+            else:
+                sections[current].append(line)
+
+        if headings < 2 or len(sections["header"]) > MAX_HEADER_LINES:
+            return None
+
+        # PDF page headers repeat the contact lines on every page
+        header = set(sections["header"])
+        return {name: "\n".join(section_lines if name == "header" else
+                                [line for line in section_lines if line not in header])
+                for name, section_lines in sections.items()}
+
+    @staticmethod
+    def contact_fields(sections):
+        """Email and phone with BackupParser's patterns, name when the first line looks like one"""
+        contact = "\n".join(filter(None, [sections.get("header"), sections.get("contact")]))
+        fields = {
+            "email": BackupParser.extract_email(contact),
+            "phone": BackupParser.extract_phone_number(contact)
+        }
+        first_line = contact.split("\n", 1)[0].strip()
+        if NAME_PATTERN.match(first_line):
+            fields["name"] = first_line.title() if first_line.isupper() else first_line
+        return {key: value for key, value in fields.items() if value}
+
+    @staticmethod
+    def skill_list(skills_text):
+        """Items of a skills section ("Category: a, b, c" lines), None when it is written as prose"""
+        # Lines that do not start with a bullet continue the previous one
+        entries = []
+        for line in str(skills_text or "").splitlines():
+            if BULLET_PATTERN.match(line) or not entries:
+                entries.append(BULLET_PATTERN.sub("", line))
+            else:
+                entries[-1] += " " + line
+
+        skills = []
+        for entry in entries:
+            category, _, items = entry.partition(":")
+            for item in SKILL_SPLIT_PATTERN.split(items if items.strip() else category):
+                item = item.strip().rstrip(".")
+                if item and len(item.split()) <= MAX_SKILL_WORDS and item not in skills:
+                    skills.append(item)
+        return skills if len(skills) >= MIN_LOCAL_SKILLS else None
+
+    def prepare(self, text):
+        """
+        Local fields and the compact prompt for the rest: {"fields", "prompt"},
+        None when the resume has to go to the LLM whole
+        """
+        sections = self.segment(text)
+        if sections is None:
+            return None
+
+        fields = self.contact_fields(sections)
+        skills = self.skill_list(sections.get("skills"))
+        if skills:
+            fields["skills"] = skills
+
+        wanted = [name for name in ("name", "location", "skills") if name not in fields]
+        wanted += [name for name in LLM_SECTIONS if sections.get(name)]
+        blocks = []
+        if "name" in wanted or "location" in wanted:
+            blocks.append(("CONTACT", sections["header"]))
+        if "skills" in wanted:
+            # No usable skill list, the LLM reads them from the skills section (or summary) and the experience
+            blocks.append(("SKILLS", sections.get("skills") or sections.get("summary") or ""))
+        blocks += [(name.upper(), sections[name]) for name in LLM_SECTIONS if sections.get(name)]
+        return {"fields": fields, "prompt": self.create_prompt(wanted, blocks)}
+
+    @staticmethod
+    def create_prompt(fields, blocks):
+        """Compact prompt: the wanted fields' JSON shape and the sections they come from"""
+        schema = ",\n".join(FIELD_SCHEMAS[field] for field in fields)
+        content = "\n\n".join(f"[{title}]\n{body}" for title, body in blocks if body)
+        return (
+            "Extract these resume fields as JSON. Only use information in the sections below, "
+            "null or [] when absent, keep values concise.\n"
+            f"{{\n{schema}\n}}\n"
+            + ("Skills: technical and professional skills, tools and methods, no generic soft skills.\n"
+               if "skills" in fields else "")
+            + f"\n{content}"
+        )
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import pickle
+from collections import deque
+
+# ------ COMPILED SKILL / EDUCATION PATTERN MATCHER ------
+# The entity_ruler patterns (token sequences of LOWER or TEXT values) compiled into an Aho-Corasick
+# automaton over lowercased tokens. A text is tokenized once (spaCy's tokenizer only, no tagger,
+# parser or NER) and every pattern is found in one pass over its tokens. Overlapping matches are
+# resolved the way the entity ruler does it, so the output is the same as the ruler's entities.
+
+
+class PatternAutomaton:
+    """Aho-Corasick automaton built from an entity_ruler patterns file, pickled next to its source's hash"""
+
+    def __init__(self, patterns):
+        """patterns is a list of (label, [(lower token, exact text or None), ...])"""
+        self.labels = []
+        self.lengths = []
+        self.cases = [] # per pattern, the exact token texts for TEXT patterns, None for LOWER only
+        self.goto = [dict()]
+        self.outputs = [[]]
+
+        for label, tokens in patterns:
+            if not tokens:
+                continue
+            state = 0
+            for lower, _ in tokens:
+                if lower not in self.goto[state]:
+                    self.goto.append(dict())
+                    self.outputs.append([])
+                    self.goto[state][lower] = len(self.goto) - 1
+                state = self.goto[state][lower]
+            exact = tuple(text for _, text in tokens)
+            self.outputs[state].append(len(self.labels))
+            self.labels.append(label)
+            self.lengths.append(len(tokens))
+            self.cases.append(exact if any(text is not None for text in exact) else None)
+
+        # Failure links, breadth first; a state also reports the matches of the state its link points to
+        self.fail = [0] * len(self.goto)
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, child in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(token, 0)
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+                queue.append(child)
+
+    @classmethod
+    def from_jsonl(cls, path):
+        """Read entity_ruler patterns, a pattern with anything but LOWER / TEXT tokens is skipped"""
+        patterns = []
+        with open(path, "r", encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if not isinstance(entry["pattern"], list):
+                    continue
+                tokens = []
+                for token in entry["pattern"]:
+                    if set(token) == {"LOWER"}:
+                        tokens.append((token["LOWER"].lower(), None))
+                    elif set(token) == {"TEXT"}:
+                        tokens.append((token["TEXT"].lower(), token["TEXT"]))
+                    else:
+                        tokens = None
+                        break
+                if tokens:
+                    patterns.append((entry["label"], tokens))
+        return cls(patterns)
+
+    @classmethod
+    def load(cls, path, cache_dir):
+        """Compiled automaton of a patterns file, read from the pickle cache while the file is unchanged"""
+        with open(path, "rb") as file:
+            source_hash = hashlib.sha256(file.read()).hexdigest()
+
+        cache_path = os.path.join(cache_dir, f"{os.path.basename(path)}.{source_hash[:16]}.pkl") if cache_dir else None
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, "rb") as file:
+                    return pickle.load(file)
+            except Exception as e:
+                print(f"Error loading compiled patterns, rebuilding: {e}")
+
+        automaton = cls.from_jsonl(path)
+        if cache_path:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                with open(cache_path, "wb") as file:
+                    pickle.dump(automaton, file, protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception as e:
+                print(f"Error saving compiled patterns: {e}")
+        return automaton
+
+    def matches(self, tokens):
+        """All (start, end, label) matches in a list of token texts, overlapping ones included"""
+        found = []
+        state = 0
+        for i, text in enumerate(tokens):
+            lower = text.lower()
+            while state and lower not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(lower, 0)
+            for pattern in self.outputs[state]:
+                start = i + 1 - self.lengths[pattern]
+                exact = self.cases[pattern]
+                if exact and any(want is not None and want != tokens[start + j] for j, want in enumerate(exact)):
+                    continue
+                found.append((start, i + 1, self.labels[pattern]))
+        return found
+
+    def spans(self, tokens):
+        """Non-overlapping matches, longest first then leftmost, as the entity ruler keeps them"""
+        kept = []
+        seen = set()
+        for start, end, label in sorted(self.matches(tokens), key=lambda m: (m[1] - m[0], -m[0]), reverse=True):
+            if start not in seen and end - 1 not in seen:
+                kept.append((start, end, label))
+                seen.update(range(start, end))
+        return sorted(kept)
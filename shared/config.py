@@ -20,3 +20,58 @@ class Config:
     MODEL_NAME = "gpt-3.5-turbo"
     MAX_TOKENS = 3000
     TEMPERATURE = 0.1
+    RECOMMENDATION_PROMPT_TOKENS = 3000 # prompt size the resume and job entries are trimmed to fit
+    JOB_DIGEST_MAX_REQUIREMENTS = 8
+    JOB_DIGEST_SUMMARY_CHARS = 600
+    RECOMMENDATION_CONCURRENCY = 3 # per-job requests in flight at once in fan-out mode
+    RECOMMENDATION_JOB_MAX_TOKENS = 1000 # completion limit of a single-job request in fan-out mode
+    RECOMMENDATION_TIMEOUT = 30 # seconds before a single-job request is given up on
+    RECOMMENDATION_CACHE_SIZE = 1000 # recommendations kept in memory per worker
+    RECOMMENDATION_CACHE_TTL = 7 * 24 * 3600 # seconds before a cached recommendation is regenerated
+    RECOMMENDATION_CACHE_PATH = os.getenv("RECOMMENDATION_CACHE_PATH", "data/recommendation_cache.sqlite3") # empty to disable
+    RESUME_WORKERS = int(os.getenv("RESUME_WORKERS", "2")) # resume parsing threads per API process
+    RESUME_QUEUE_DEPTH = int(os.getenv("RESUME_QUEUE_DEPTH", "100")) # uploads waiting before new ones are refused
+    RESUME_UPLOAD_DIR = os.getenv("RESUME_UPLOAD_DIR", "data/uploads")
+    RESUME_QUEUE_POLL = 2 # seconds an idle worker waits before checking the queue again
+    RESUME_TASK_TIMEOUT = 600 # seconds before a running task is considered abandoned and retried
+    RESUME_TASK_ATTEMPTS = 3
+    BULK_PARSE_CONCURRENCY = 8 # OpenAI parse calls in flight at once in a bulk upload
+    BULK_MAX_ZIP_MEMBERS = 500 # zip archives with more entries are refused
+    SPACY_MODEL = "en_core_web_sm"
+    DB_CHUNK_SIZE = 5000 # rows per DataFrame when a table is streamed from a server-side cursor
+    SALARY_ANNUAL_MIN = 1000 # annualized salaries outside this range are treated as misparsed
+    SALARY_ANNUAL_MAX = 2000000
+    NLP_BATCH_SIZE = 64 # texts per tokenizer.pipe batch
+    PATTERN_CACHE_DIR = os.getenv("PATTERN_CACHE_DIR", "data/patterns") # pickled skill/education matchers, empty to disable
+    NLP_WARMUP = os.getenv("NLP_WARMUP", "true").lower() == "true" # load spaCy and NLTK assets at API startup
+    RESUME_SEGMENTER = os.getenv("RESUME_SEGMENTER", "true").lower() == "true" # local section pre-pass, compact parse prompt
+    PDF_BACKEND = os.getenv("PDF_BACKEND", "pypdf2") # "pypdf2" or "pymupdf" (faster, needs PyMuPDF)
+    PDF_MAX_PAGES = 20 # pages of an upload that are read, the rest is ignored
+    PDF_MAX_CHARS = 50000 # extraction stops once this much text is read
+    PDF_MAX_BYTES = 10 * 1024 * 1024 # larger uploads are refused
+    PDF_PARALLEL_MIN_PAGES = 8 # documents with this many pages are split across processes
+    PDF_WORKERS = min(os.cpu_count() or 2, 4) # shared extraction pool: pages of long documents, files of bulk uploads
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai") # "openai" or "local" (offline, CPU only)
+    EMBEDDING_MODEL = "text-embedding-3-small"
+    LOCAL_EMBEDDING_PATH = os.getenv("LOCAL_EMBEDDING_PATH", "data/local_embedding.joblib")
+    LOCAL_EMBEDDING_FEATURES = 2 ** 16
+    LOCAL_EMBEDDING_DIMS = 256
+    EMBEDDING_BATCH_SIZE = 1000 # texts per embeddings request (API limit is 2048)
+    EMBEDDING_BATCH_TOKENS = 250000 # tokens per embeddings request (API limit is 300k)
+    EMBEDDING_MAX_INPUT_TOKENS = 8191
+    EMBEDDING_CONCURRENCY = 4
+    EMBEDDING_CACHE_SIZE = 10000 # embeddings kept in memory per worker
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/embedding_cache.sqlite3") # empty to disable
+    MATCH_TOP_K = 10
+    MATCH_THRESHOLD = 0.45
+    FILTER_INDEX_TTL = 300 # seconds before the in-memory job filter index is rebuilt
+    FILTER_OVERFETCH = 10 # ivf mode fetches k * this many results before applying filters
+    HYBRID_CANDIDATES = 200 # jobs pulled from Elasticsearch and re-ranked in hybrid mode
+    HYBRID_RRF_K = 60 # reciprocal rank fusion constant
+    ALERT_THRESHOLD = 0.55 # default score a new job needs to alert a subscribed resume
+    # "exact", "mmap" (shared embedding file) or "ivf" (approximate, needs the index file)
+    MATCH_MODE = os.getenv("MATCH_MODE", "exact")
+    ANN_INDEX_PATH = os.getenv("ANN_INDEX_PATH", "data/job_index.npz")
+    ANN_N_PROBE = 8
+    EMBEDDING_FILE_PATH = os.getenv("EMBEDDING_FILE_PATH", "data/job_embeddings.bin")
+    EMBEDDING_FILE_DTYPE = os.getenv("EMBEDDING_FILE_DTYPE", "float16") # "float32", "float16" or "int8"
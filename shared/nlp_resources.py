@@ -0,0 +1,102 @@
+import threading
+from pathlib import Path
+from shared.config import Config
+
+# ------ SHARED NLP RESOURCES ------
+# spaCy and NLTK assets are loaded once per process, on first use or by warm() at startup.
+# Imports are deferred so modules that never touch NLP do not pay for them.
+
+PATTERNS_DIR = Path(__file__).resolve().parent.parent / "resume_parser" / "patterns"
+
+_lock = threading.RLock()
+_resources = dict()
+
+
+def _get(name, load):
+    """Load a resource once, concurrent first callers wait for the same load"""
+    if name not in _resources:
+        with _lock:
+            if name not in _resources:
+                _resources[name] = load()
+    return _resources[name]
+
+
+def stop_words():
+    """English and French NLTK stopwords"""
+    def load():
+        from nltk.corpus import stopwords
+        return frozenset(stopwords.words(["english", "french"]))
+    return _get("stop_words", load)
+
+
+def lemmatizer():
+    def load():
+        from nltk.stem import WordNetLemmatizer
+        lemmatizer = WordNetLemmatizer()
+        # WordNet is read lazily on the first lemmatize call, do it now
+        lemmatizer.lemmatize("warmup")
+        return lemmatizer
+    return _get("lemmatizer", load)
+
+
+def spacy_nlp():
+    """spaCy pipeline for the name matcher, skills are found by the compiled automaton instead"""
+    def load():
+        import spacy
+        return spacy.load(Config.SPACY_MODEL)
+    return _get("spacy_nlp", load)
+
+
+def name_matcher():
+    """Matcher for two consecutive proper nouns (first and last name), patterns added once"""
+    def load():
+        from spacy.matcher import Matcher
+        matcher = Matcher(spacy_nlp().vocab)
+        matcher.add("NAME", [[{"POS": "PROPN"}, {"POS": "PROPN"}]])
+        return matcher
+    return _get("name_matcher", load)
+
+
+def tokenizer():
+    """spaCy's English tokenizer on its own, it splits text exactly like the full pipeline"""
+    def load():
+        import spacy
+        return spacy.blank("en").tokenizer
+    return _get("tokenizer", load)
+
+
+def skill_automaton():
+    """skill_patterns.jsonl compiled for the fast skill matcher"""
+    def load():
+        from resume_parser.skill_matcher import PatternAutomaton
+        return PatternAutomaton.load(PATTERNS_DIR / "skill_patterns.jsonl", Config.PATTERN_CACHE_DIR)
+    return _get("skill_automaton", load)
+
+
+def education_automaton():
+    """education_patterns.jsonl compiled for the fast education matcher"""
+    def load():
+        from resume_parser.skill_matcher import PatternAutomaton
+        return PatternAutomaton.load(PATTERNS_DIR / "education_patterns.jsonl", Config.PATTERN_CACHE_DIR)
+    return _get("education_automaton", load)
+
+
+def pattern_matches(automaton, text=None, doc=None):
+    """(text, label) of every pattern match in the text, or in a doc it was already tokenized to"""
+    doc = doc if doc is not None else tokenizer()(str(text))
+    return [(doc[start:end].text, label) for start, end, label in automaton.spans([token.text for token in doc])]
+
+
+def warm():
+    """Load every resource now, e.g. at startup, so the first request does not pay for it"""
+    try:
+        stop_words()
+        lemmatizer()
+        tokenizer()
+        skill_automaton()
+        education_automaton()
+        spacy_nlp()
+        name_matcher()
+        print("NLP resources loaded.")
+    except Exception as e:
+        print(f"Error loading NLP resources: {e}")